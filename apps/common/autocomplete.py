@@ -0,0 +1,215 @@
+"""
+============================================================
+In-Process Autocomplete Index for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides `AutocompleteIndex`, a per-process typeahead index over a
+text field of a model, built to answer per-keystroke queries without touching
+the database.
+
+How it works:
+    - All rows are loaded once with `values_list()` (only the few response
+      columns) and their text is normalized with `normalize_search_text`
+    - Prefix matches use a sorted token list and binary search
+    - When prefixes find too few rows, word trigram similarity (the scoring
+      of PostgreSQL's pg_trgm) fills the remaining slots
+    - The index remembers the model's cache generation (`apps.common.cache`)
+      and rebuilds itself lazily once a `post_save`/`post_delete` receiver
+      has bumped it, so every worker converges after a write
+
+Usage Example:
+--------------
+    index = AutocompleteIndex(Facility, "name", ["id", "slug", "name", "city"])
+    index.search("tehr", limit=10)   # -> [{"id": 1, "slug": ..., ...}, ...]
+
+License: GPLv2
+"""
+
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from apps.common.cache import get_generation
+from apps.common.search import normalize_search_text
+
+
+def trigrams(text):
+    """
+    Return the pg_trgm style trigram set of normalized `text`.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Snapshot:
+    """
+    Immutable index data; swapped atomically on rebuild.
+    """
+
+    def __init__(self, rows, texts):
+        self.rows = rows
+        self.texts = texts
+        words = sorted(
+            (word, position)
+            for position, text in enumerate(texts)
+            for word in set(text.split())
+        )
+        # Sorted (word, row) pairs for prefix lookups by binary search.
+        self.tokens = words
+        # Trigram postings per (word, row) entry for fuzzy word matching.
+        self.word_rows = [position for _, position in words]
+        self.word_sizes = []
+        self.postings = {}
+        for entry, (word, _) in enumerate(words):
+            grams = trigrams(word)
+            self.word_sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(entry)
+
+
+class AutocompleteIndex:
+    """
+    Prefix + trigram typeahead over `search_field` of `model`.
+
+    Args:
+        model: Model class whose rows are indexed
+        search_field: Field holding the text to complete (e.g. "name")
+        fields: Columns returned for each suggestion
+        queryset: Optional queryset restricting the indexed rows
+        similarity_threshold: Minimum trigram similarity for fuzzy matches
+    """
+
+    def __init__(
+        self,
+        model,
+        search_field,
+        fields,
+        queryset=None,
+        similarity_threshold=0.3,
+    ):
+        self.model = model
+        self.search_field = search_field
+        self.fields = list(fields)
+        self.queryset = queryset
+        self.similarity_threshold = similarity_threshold
+        self._generation = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        return self.model._default_manager.all()
+
+    def get_snapshot(self):
+        """
+        Return the current snapshot, rebuilding it if the model changed.
+        """
+        generation = get_generation(self.model)
+        if self._snapshot is None or generation != self._generation:
+            with self._lock:
+                if self._snapshot is None or generation != self._generation:
+                    self._snapshot = self._build()
+                    self._generation = generation
+        return self._snapshot
+
+    def _build(self):
+        columns = list(dict.fromkeys([*self.fields, self.search_field]))
+        text_position = columns.index(self.search_field)
+        rows, texts = [], []
+        for values in self.get_queryset().order_by().values_list(*columns):
+            rows.append(dict(zip(self.fields, values)))
+            texts.append(normalize_search_text(values[text_position]))
+        return _Snapshot(rows, texts)
+
+    def search(self, query, limit=10):
+        """
+        Return up to `limit` suggestion dicts for the raw `query`.
+        """
+        query = normalize_search_text(query)
+        if not query or limit <= 0:
+            return []
+
+        snapshot = self.get_snapshot()
+        positions = self._prefix_matches(snapshot, query)
+        if len(positions) < limit:
+            seen = set(positions)
+            positions.extend(
+                position
+                for position in self._trigram_matches(snapshot, query)
+                if position not in seen
+            )
+        return [snapshot.rows[position] for position in positions[:limit]]
+
+    def _prefix_matches(self, snapshot, query):
+        """
+        Rows where every query word starts one of the row's words; rows whose
+        whole text starts with the query come first, then shorter texts.
+        """
+        words = query.split()
+        candidates = None
+        for word in sorted(words, key=len, reverse=True):
+            matched = set()
+            index = bisect_left(snapshot.tokens, (word, -1))
+            while index < len(snapshot.tokens):
+                token, position = snapshot.tokens[index]
+                if not token.startswith(word):
+                    break
+                matched.add(position)
+                index += 1
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        texts = snapshot.texts
+        return sorted(
+            candidates,
+            key=lambda position: (
+                not texts[position].startswith(query),
+                len(texts[position]),
+                texts[position],
+            ),
+        )
+
+    def _trigram_matches(self, snapshot, query):
+        """
+        Rows ordered by trigram similarity above the threshold.
+
+        Each query word is scored against the row's best matching word (like
+        pg_trgm's `word_similarity`), and a row scores the mean over the
+        query words, so typos in long names are still found.
+        """
+        words = query.split()
+        totals = Counter()
+        for word in words:
+            grams = trigrams(word)
+            shared = Counter()
+            for gram in grams:
+                shared.update(snapshot.postings.get(gram, ()))
+
+            best = {}
+            for entry, common in shared.items():
+                union = len(grams) + snapshot.word_sizes[entry] - common
+                similarity = common / union if union else 0.0
+                position = snapshot.word_rows[entry]
+                if similarity > best.get(position, 0.0):
+                    best[position] = similarity
+            totals.update(best)
+
+        scored = []
+        for position, total in totals.items():
+            similarity = total / len(words)
+            if similarity >= self.similarity_threshold:
+                scored.append((-similarity, len(snapshot.texts[position]), position))
+        return [position for _, _, position in sorted(scored)]
@@ -0,0 +1,111 @@
+"""
+============================================================
+Cache Utilities for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides per-model generation counters stored in Django's cache.
+
+Every cached value that depends on a model's rows embeds the model's current
+generation in its key. Writing to the model bumps the generation, so all of
+the stale entries become unreachable at once, in O(1), without scanning or
+deleting keys. Entries left behind simply expire with their timeout.
+
+Writers bump with `bump_generation_on_commit()`: inside a transaction the
+bump waits for the commit, so no reader can pair the new generation with
+rows from before the write and cache them under the new key.
+
+Usage Example:
+--------------
+    key = make_cache_key("count", get_generation(MedicalFacility), sql)
+    bump_generation_on_commit(MedicalFacility)   # from post_save / post_delete
+
+License: GPLv2
+"""
+
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.conf import settings
+from django.db import transaction
+
+GENERATION_KEY_PREFIX = "hcore:generation"
+
+
+def get_cache():
+    """
+    Return the cache backend used for generations and derived values.
+    """
+    return caches[getattr(settings, "HCORE_CACHE_ALIAS", "default")]
+
+
+def _initial_generation():
+    # Seeded from the clock so that a generation lost to eviction or a cache
+    # restart never resumes at a value that older entries were keyed on.
+    return time.time_ns() // 1000
+
+
+def generation_key(model):
+    return f"{GENERATION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def get_generation(model):
+    """
+    Return the current generation of `model`, initializing it on first use.
+    """
+    cache = get_cache()
+    key = generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_generations(*models):
+    """
+    Return the generations of several models with a single cache round trip.
+    """
+    keys = [generation_key(model) for model in models]
+    found = get_cache().get_many(keys)
+    return tuple(
+        found[key] if key in found else get_generation(model)
+        for key, model in zip(keys, models)
+    )
+
+
+def bump_generation(model):
+    """
+    Invalidate every cached value derived from `model`.
+    """
+    cache = get_cache()
+    key = generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key is missing (first write, or evicted): start a new series.
+        cache.add(key, _initial_generation(), timeout=None)
+
+
+def bump_generation_on_commit(model, using=None):
+    """
+    Bump `model`'s generation once the current transaction of `using`
+    commits (right away outside of a transaction; never on rollback).
+    """
+    transaction.on_commit(lambda: bump_generation(model), using=using)
+
+
+def make_cache_key(prefix, *parts):
+    """
+    Build a bounded-length cache key from arbitrary key parts.
+    """
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return f"hcore:{prefix}:{digest}"
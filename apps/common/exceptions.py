@@ -0,0 +1,49 @@
+"""
+============================================================
+Common API Exceptions for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides Django REST Framework exceptions shared by the base
+ViewSets, mainly for conditional requests:
+    - NotModified: 304 answer to `If-None-Match` / `If-Modified-Since`
+      (rendered without a body by `BaseParsedViewSet.handle_exception`)
+    - PreconditionFailed: 412 answer to `If-Match` / `If-Unmodified-Since`
+    - PayloadTooLarge: 413 answer to request bodies or uploaded files over
+      the configured size limits (`apps.common.parsers`)
+
+License: GPLv2
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = _("Not modified.")
+    default_code = "not_modified"
+
+    def __init__(self, headers=None):
+        super().__init__()
+        self.headers = headers or {}
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _("The resource has been modified since it was last read.")
+    default_code = "precondition_failed"
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _("Request body too large.")
+    default_code = "payload_too_large"
@@ -0,0 +1,184 @@
+"""
+============================================================
+Cached Lookup Tables for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file keeps small, rarely changing reference tables (types, categories,
+...) in per-process memory, so that validating and rendering the foreign keys
+that point at them costs no queries.
+
+How it works:
+    - `get_lookup_table(model)` returns the process-wide `LookupTable` of a
+      model; the first use loads every row with one query
+    - The table remembers the model's cache generation (`apps.common.cache`)
+      and reloads once a `post_save`/`post_delete` receiver has bumped it, so
+      every worker converges after a write. The generation is re-read at most
+      every `check_interval` seconds, and always before reporting a missing
+      row (so rows created a moment ago are found)
+    - `CachedPrimaryKeyRelatedField` validates primary keys against the table
+    - `CachedLookupField` renders a related object with a serializer, from the
+      local `<name>_id` column and the table; the rendered data is memoized
+      per table load, so expanded lookups need neither a join nor a query
+
+`BaseModelSerializer` uses both for the fields listed in
+`Meta.cached_lookup_fields`.
+
+Usage Example:
+--------------
+    table = get_lookup_table(FacilityType)
+    table.get(3)                                  # -> FacilityType or None
+    table.get_representation(3, FacilityTypeSerializer)
+
+License: GPLv2
+"""
+
+import threading
+import time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+from apps.common.cache import get_generation
+
+
+class _Snapshot:
+    """
+    Immutable table data; swapped atomically on reload.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.representations = {}
+
+
+class LookupTable:
+    """
+    All rows of `model`, by primary key, held in process memory.
+
+    Args:
+        model: Model class of the reference table
+        check_interval: Seconds between two reads of the model's generation
+    """
+
+    def __init__(self, model, check_interval=1.0):
+        self.model = model
+        self.check_interval = check_interval
+        self._generation = None
+        self._checked_at = 0.0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get_snapshot(self, force=False):
+        """
+        Return the current snapshot, reloading it if the model changed.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._snapshot is not None
+            and now - self._checked_at < self.check_interval
+        ):
+            return self._snapshot
+
+        generation = get_generation(self.model)
+        if self._snapshot is None or generation != self._generation:
+            with self._lock:
+                if self._snapshot is None or generation != self._generation:
+                    rows = {obj.pk: obj for obj in self.model._default_manager.all()}
+                    self._snapshot = _Snapshot(rows)
+                    self._generation = generation
+        self._checked_at = now
+        return self._snapshot
+
+    def get(self, pk):
+        """
+        Return the row with primary key `pk`, or None.
+        """
+        obj = self.get_snapshot().rows.get(pk)
+        if obj is None:
+            obj = self.get_snapshot(force=True).rows.get(pk)
+        return obj
+
+    def all(self):
+        return list(self.get_snapshot().rows.values())
+
+    def get_representation(self, pk, serializer_class, options=None):
+        """
+        Return `serializer_class(row).data` for the row `pk` (or None),
+        memoized until the table reloads. The serializer must not depend on
+        the request context.
+        """
+        snapshot = self.get_snapshot()
+        key = (serializer_class, repr(sorted((options or {}).items())), pk)
+        data = snapshot.representations.get(key)
+        if data is None:
+            obj = self.get(pk)
+            if obj is None:
+                return None
+            data = dict(serializer_class(obj, **(options or {})).data)
+            snapshot.representations[key] = data
+        return dict(data)
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_lookup_table(model):
+    """
+    Return the process-wide `LookupTable` of `model`.
+    """
+    table = _tables.get(model)
+    if table is None:
+        with _tables_lock:
+            table = _tables.setdefault(model, LookupTable(model))
+    return table
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    `PrimaryKeyRelatedField` validated against the model's `LookupTable`
+    instead of one query per value. The queryset must be the whole table.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        queryset = self.get_queryset()
+        try:
+            pk = queryset.model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = get_lookup_table(queryset.model).get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class CachedLookupField(serializers.Field):
+    """
+    Read-only field rendering a related lookup row with `serializer_class`.
+
+    Its `source` is the local foreign key column (e.g. `type_id`), so the
+    related row is read from the `LookupTable`, not joined or queried.
+    """
+
+    def __init__(self, serializer_class, model, serializer_options=None, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.serializer_class = serializer_class
+        self.model = model
+        self.serializer_options = serializer_options or {}
+
+    def to_representation(self, value):
+        return get_lookup_table(self.model).get_representation(
+            value, self.serializer_class, self.serializer_options
+        )
@@ -12,13 +12,196 @@ Repository:    https://github.com/Hcore-ir/backend-core
 Description:
 -------------
 This file provides shared base classes and utilities for Django REST Framework,
-including base Pagination. These components are designed to be reusable
+including base Pagination with cached / approximate counts and a keyset (cursor)
+pagination for deep, count-free paging. These components are designed to be reusable
 across multiple apps to maintain consistency and reduce code duplication.
 
 License: GPLv2
 """
 
-from rest_framework.pagination import PageNumberPagination
+import datetime
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import (
+    EmptyResultSet,
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Local cache utilities
+from apps.common.cache import get_cache, get_generations, make_cache_key
+
+
+def _cursor_value(value):
+    """
+    JSON fallback for cursor positions that keeps full datetime precision.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor.")
+
+
+def _models_for_query(query):
+    """
+    Return the models whose tables take part in `query` (base table and joins).
+    """
+    by_table = {model._meta.db_table: model for model in apps.get_models()}
+    tables = {query.get_meta().db_table}
+    tables.update(join.table_name for join in query.alias_map.values())
+    return sorted(
+        (by_table[table] for table in tables if table in by_table),
+        key=lambda model: model._meta.label_lower,
+    )
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for `queryset`, or None if unavailable.
+
+    Only PostgreSQL is supported: an unfiltered queryset reads `reltuples`
+    from `pg_class`, anything else reads the top-level "Plan Rows" of
+    `EXPLAIN (FORMAT JSON)`. Neither touches the table's rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where and len(query.alias_map) <= 1 and not query.distinct:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+        else:
+            try:
+                sql, params = query.sql_with_params()
+            except EmptyResultSet:
+                return 0
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    if isinstance(row[0], (int, float)):
+        estimate = row[0]
+    else:
+        plan = json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        estimate = plan[0]["Plan"]["Plan Rows"]
+    # `reltuples` is -1 for tables that were never vacuumed/analyzed.
+    return int(estimate) if estimate >= 0 else None
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """
+    Django paginator whose `count` is cached and, for large results, estimated.
+
+    - Exact counts are cached per normalized query (the count SQL without its
+      ORDER BY, so filters and search terms are the key and ordering is not)
+      and per generation of every model the query touches, so any write to
+      those models invalidates them.
+    - When the planner estimates at least `estimate_threshold` rows, that
+      estimate is returned (and cached) instead and `count_is_approximate`
+      is set. The cache is checked first, so a cached count costs no query.
+
+    Both knobs come from the `PAGINATION_COUNT_CACHE_TIMEOUT` and
+    `PAGINATION_COUNT_ESTIMATE_THRESHOLD` settings (`None` disables).
+    """
+
+    count_is_approximate = False
+
+    @property
+    def count_cache_timeout(self):
+        return getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 300)
+
+    @property
+    def estimate_threshold(self):
+        return getattr(settings, "PAGINATION_COUNT_ESTIMATE_THRESHOLD", None)
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+
+        queryset = self.object_list.order_by()
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        cache = get_cache()
+        key = make_cache_key(
+            "page-count",
+            get_generations(*_models_for_query(queryset.query)),
+            queryset.db,
+            sql,
+            params,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            count, self.count_is_approximate = cached
+            return count
+
+        count = None
+        threshold = self.estimate_threshold
+        if threshold is not None:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= threshold:
+                count, self.count_is_approximate = estimate, True
+        if count is None:
+            count = queryset.count()
+        cache.set(
+            key, (count, self.count_is_approximate), timeout=self.count_cache_timeout
+        )
+        return count
+
+    def validate_number(self, number):
+        if not self.count_is_approximate:
+            return super().validate_number(number)
+        # An estimate can undershoot: only reject numbers that are never valid.
+        number = self._validate_number_type(number)
+        if number < 1:
+            raise InvalidPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom : bottom + self.per_page], number, self
+        )
+
+    def _validate_number_type(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            return int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage(self.error_messages["invalid_page"])
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -29,6 +212,8 @@ class StandardResultsSetPagination(PageNumberPagination):
     - 10 items per page
     - Clients can override using `?page_size=<int>`
     - Maximum allowed `page_size` is 100
+    - `count` is served from `CachedCountPaginator`; `count_approximate`
+      tells clients whether it is a planner estimate
 
     This class is intended to be reused across all paginated views.
     """
@@ -36,3 +221,215 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_approximate": self.page.paginator.count_is_approximate,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_approximate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
+
+
+class KeysetResultsSetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination for list views that must stay fast at any depth.
+
+    The page boundary is expressed as the values of the ordering columns of
+    the last row returned, so every page is fetched with an indexed
+    `WHERE (ordering columns) > (cursor values)` condition instead of an
+    `OFFSET` scan, and no `COUNT(*)` is ever issued.
+
+    Ordering:
+    - Taken from the queryset as prepared by the view's filter backends
+      (e.g. a whitelisted `?ordering=`, or the view's default `ordering`,
+      from `OrderingFilter`)
+    - Falls back to the model's `Meta.ordering` (e.g. `["-created_at"]`)
+    - The primary key is always appended as a tiebreaker, so rows sharing the
+      same ordering values are never skipped or repeated
+
+    Ordering fields are expected to be non-nullable. Cursors whose values do
+    not fit the ordering fields answer 404 "Invalid cursor".
+
+    Response shape:
+        {"next": <url|null>, "previous": <url|null>, "results": [...]}
+    """
+
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(),
+            StandardResultsSetPagination.page_query_param,
+        )
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.cursor is not None:
+            # Positions come from the client: values the ordering fields
+            # cannot hold (e.g. a non-date for a datetime) are rejected here.
+            try:
+                queryset = queryset.filter(
+                    self._keyset_condition(self.cursor.position, reverse)
+                )
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row to learn whether another page follows.
+        results = list(queryset[: self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering of `queryset` with the primary key appended.
+        """
+        query = queryset.query
+        if query.order_by:
+            ordering = list(query.order_by)
+        elif query.default_ordering and query.get_meta().ordering:
+            ordering = list(query.get_meta().ordering)
+        else:
+            ordering = []
+
+        if not all(isinstance(term, str) for term in ordering):
+            raise ImproperlyConfigured(
+                "Keyset pagination only supports field name orderings."
+            )
+
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            ("-" if term.startswith("-") else "") + pk_name
+            if term.lstrip("-") == "pk"
+            else term
+            for term in ordering
+        ]
+        if not any(term.lstrip("-") == pk_name for term in ordering):
+            descending = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(("-" if descending else "") + pk_name)
+        return tuple(ordering)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = payload["p"]
+            reverse = bool(payload.get("r", 0))
+            signature = payload["o"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only meaningful for the ordering it was issued for.
+        if (
+            signature != self._ordering_signature()
+            or not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        payload = {"p": cursor.position, "o": self._ordering_signature()}
+        if cursor.reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Stepped past the end: go back from where the cursor pointed.
+            position = self.cursor.position
+        else:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for term in ordering:
+            value = instance
+            for part in term.lstrip("-").split(LOOKUP_SEP):
+                if isinstance(value, dict):
+                    value = value[part]
+                    continue
+                try:
+                    field = value._meta.get_field(part)
+                except (AttributeError, FieldDoesNotExist):
+                    value = getattr(value, part)
+                else:
+                    # Compare foreign keys by their raw column value.
+                    value = getattr(
+                        value, field.attname if field.is_relation else part
+                    )
+            position.append(value)
+        return json.loads(json.dumps(position, default=_cursor_value))
+
+    def _keyset_condition(self, position, reverse):
+        """
+        Build `(a, b, c) > (x, y, z)` as an OR-chain that respects the
+        direction of each ordering term.
+        """
+        condition = Q()
+        equal = Q()
+        for term, value in zip(self.ordering, position):
+            descending = term.startswith("-") != reverse
+            name = term.lstrip("-")
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _ordering_signature(self):
+        return ",".join(self.ordering)
@@ -0,0 +1,145 @@
+"""
+============================================================
+Request Parsers for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides the request parsers of the base ViewSets:
+    - FastJSONParser: a drop-in replacement for DRF's `JSONParser` that
+      decodes with `orjson` when it is installed (and the body is UTF-8),
+      and with the stdlib `json` module otherwise. Unlike the stdlib
+      decoder, `orjson` rejects `NaN` / `Infinity` literals, which are not
+      valid JSON.
+    - StreamingMultiPartParser: `MultiPartParser` that never buffers file
+      parts in memory and bounds what it accepts:
+        • a request whose `Content-Length` exceeds the limit is rejected
+          with 413 before any of its body is read
+        • each file part is streamed chunk by chunk into a temporary file
+          (`BoundedUploadHandler`); the upload stops with 413 as soon as
+          it grows past the per-file limit
+        • a file part whose declared content type is not allowed is
+          rejected with 415 before its first chunk is stored
+
+Limits come from the view (`upload_max_size`, `upload_content_types`),
+falling back to the `UPLOAD_MAX_SIZE` setting (5 MiB) and to any content
+type.
+
+Usage Example:
+--------------
+    class FacilityViewSet(BaseCRUDViewSet):
+        parser_classes = [FastJSONParser, StreamingMultiPartParser]
+        upload_max_size = 2 * 1024 * 1024
+        upload_content_types = ["image/png", "image/jpeg"]
+
+License: GPLv2
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+# Local exceptions and renderers
+from apps.common.exceptions import PayloadTooLarge
+from apps.common.renderers import FastJSONRenderer, orjson
+
+DEFAULT_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+
+
+class FastJSONParser(JSONParser):
+    """
+    `JSONParser` decoding with `orjson` (falls back to the stdlib decoder).
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding") or "utf-8"
+        if orjson is None or encoding.lower().replace("_", "-") not in (
+            "utf-8",
+            "utf8",
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream file parts to temporary files, enforcing a size limit and a
+    content type whitelist while the upload is in progress.
+    """
+
+    def __init__(self, request=None, max_size=None, content_types=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.content_types = content_types
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        if self.content_types is not None and content_type not in self.content_types:
+            raise UnsupportedMediaType(
+                content_type,
+                detail=_("Unsupported file type %(type)s for %(field)s.")
+                % {"type": content_type, "field": field_name},
+            )
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_size is not None and start + len(raw_data) > self.max_size:
+            self.upload_interrupted()
+            raise PayloadTooLarge(
+                _("Uploaded files are limited to %(size)d bytes.")
+                % {"size": self.max_size}
+            )
+        return super().receive_data_chunk(raw_data, start)
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    """
+    `MultiPartParser` streaming file parts to bounded temporary storage.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        view = parser_context.get("view")
+
+        max_size = getattr(view, "upload_max_size", None)
+        if max_size is None:
+            max_size = getattr(settings, "UPLOAD_MAX_SIZE", DEFAULT_UPLOAD_MAX_SIZE)
+        content_types = getattr(view, "upload_content_types", None)
+
+        # Room for the other form fields, as Django bounds them separately.
+        max_request_size = max_size + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_request_size:
+            raise PayloadTooLarge()
+
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        upload_handlers = [
+            BoundedUploadHandler(request._request, max_size, content_types)
+        ]
+        try:
+            encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+            parser = DjangoMultiPartParser(meta, stream, upload_handlers, encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as exc:
+            raise ParseError("Multipart form parse error - %s" % str(exc))
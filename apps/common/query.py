@@ -0,0 +1,150 @@
+"""
+============================================================
+Query Planning Utilities for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file derives the `select_related` / `prefetch_related` plan a queryset
+needs in order to be serialized without per-row queries.
+
+The plan is read from a serializer's declared fields:
+    - Nested serializers and non-pk related fields on forward single-valued
+      relations (ForeignKey, OneToOne) become `select_related` joins
+    - Nested `many=True` serializers, many-related fields and reverse
+      relations become `prefetch_related` lookups
+    - Dotted sources (e.g. `source="type.title"`) join every relation they
+      traverse
+    - `PrimaryKeyRelatedField` needs nothing: DRF reads the `<name>_id`
+      column directly; neither do fields whose source is that column
+
+Extra lookup paths (e.g. active `__` orderings or search fields) can be
+folded into the same plan with `plan_lookups()`.
+
+License: GPLv2
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import relations, serializers
+
+
+class RelatedPlan:
+    """
+    Collected `select_related` and `prefetch_related` lookups.
+    """
+
+    def __init__(self):
+        self.select = set()
+        self.prefetch = set()
+
+    def add(self, path, many):
+        if many:
+            self.prefetch.add(path)
+        else:
+            self.select.add(path)
+
+    def apply(self, queryset):
+        """
+        Return `queryset` with the plan applied.
+        """
+        # A path that is prefetched makes its selected sub-paths prefetches.
+        select = sorted(
+            path
+            for path in self.select
+            if not any(
+                path == lookup or path.startswith(lookup + LOOKUP_SEP)
+                for lookup in self.prefetch
+            )
+        )
+        if select:
+            queryset = queryset.select_related(*select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch))
+        return queryset
+
+
+def _join(prefix, name):
+    return f"{prefix}{LOOKUP_SEP}{name}" if prefix else name
+
+
+def plan_lookups(model, lookups, plan=None, prefix="", many=False):
+    """
+    Add every relation traversed by the `__` lookup paths to `plan`.
+
+    Only the relations a lookup passes through are joined; its final
+    component is the compared or ordered column (e.g. `type__title` joins
+    `type`).
+    """
+    plan = plan or RelatedPlan()
+    for lookup in lookups:
+        current_model, path, is_many = model, prefix, many
+        for name in lookup.split(LOOKUP_SEP)[:-1]:
+            try:
+                field = current_model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or field.related_model is None:
+                break
+            path = _join(path, name)
+            is_many = is_many or field.many_to_many or field.one_to_many
+            plan.add(path, is_many)
+            current_model = field.related_model
+    return plan
+
+
+def plan_serializer(serializer, model=None, plan=None, prefix="", many=False):
+    """
+    Return the `RelatedPlan` needed to render `serializer` without N+1 queries.
+    """
+    plan = plan or RelatedPlan()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = model or getattr(getattr(serializer, "Meta", None), "model", None)
+    if model is None:
+        return plan
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            if isinstance(field, serializers.BaseSerializer):
+                plan_serializer(field, model, plan, prefix, many)
+            continue
+
+        current_model, path, is_many = model, prefix, many
+        parts = field.source.split(".")
+        for position, name in enumerate(parts):
+            try:
+                model_field = current_model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation or model_field.related_model is None:
+                break
+            if name != model_field.name:
+                # `<name>_id`: the local column, not the relation.
+                break
+
+            is_last = position == len(parts) - 1
+            if is_last and isinstance(field, relations.PrimaryKeyRelatedField):
+                # Rendered from the local `<name>_id` column.
+                break
+
+            path = _join(path, name)
+            is_many = is_many or model_field.many_to_many or model_field.one_to_many
+            plan.add(path, is_many)
+            current_model = model_field.related_model
+
+            if is_last:
+                nested = field
+                if isinstance(nested, serializers.ListSerializer):
+                    nested = nested.child
+                if isinstance(nested, serializers.BaseSerializer):
+                    plan_serializer(nested, current_model, plan, path, is_many)
+    return plan
@@ -0,0 +1,131 @@
+"""
+============================================================
+JSON Renderer for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides `FastJSONRenderer`, a drop-in replacement for DRF's
+`JSONRenderer` that encodes with `orjson` when it is installed.
+
+How it works:
+    - `orjson` encodes dicts, lists, strings, numbers, datetimes, dates, times
+      and UUIDs natively, writing UTC datetimes with a `Z` suffix like DRF
+    - Everything else (Decimals, lazy translation strings, querysets,
+      generators...) goes through DRF's `JSONEncoder.default()`, so values
+      are converted exactly as before
+    - `\\u2028` / `\\u2029` are escaped, as DRF does, so the output stays a
+      strict JavaScript subset
+    - Without `orjson`, or for output `orjson` cannot produce (indents other
+      than 2, `ensure_ascii`, non-compact separators), the stdlib encoder of
+      `JSONRenderer` is used
+
+The only intended difference: non-finite floats (`NaN`, `Infinity`) are
+written as `null` instead of invalid JSON.
+
+`CSVPassthroughRenderer` and `NDJSONPassthroughRenderer` only take part in
+content negotiation, for views that stream their own body in those formats
+(e.g. `ExportMixin.export`); errors are still written as JSON.
+
+Usage Example:
+--------------
+    REST_FRAMEWORK = {
+        "DEFAULT_RENDERER_CLASSES": ["apps.common.renderers.FastJSONRenderer"],
+    }
+
+License: GPLv2
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def encode_default(obj):
+    """
+    Convert a value `orjson` does not encode natively, like DRF does.
+    """
+    return _encoder.default(obj)
+
+
+def dumps(data, indent=None):
+    """
+    Encode `data` to JSON bytes (compact, UTF-8), with `orjson` if available.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data, renderer_context={"indent": indent})
+    options = ORJSON_OPTIONS
+    if indent == 2:
+        options |= orjson.OPT_INDENT_2
+    ret = orjson.dumps(data, default=encode_default, option=options)
+    if b"\xe2\x80" in ret:
+        ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` encoding with `orjson` (falls back to the stdlib encoder).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent not in (None, 2)
+            or self.ensure_ascii
+            or not self.compact
+            or self.encoder_class is not JSONEncoder
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data, indent=indent)
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer for views answering with a body they already encoded (e.g. a
+    `StreamingHttpResponse`); data it is handed (errors) is written as JSON.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, (bytes, str)):
+            return data
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return dumps(data)
+
+
+class CSVPassthroughRenderer(PassthroughRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONPassthroughRenderer(PassthroughRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
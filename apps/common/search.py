@@ -0,0 +1,398 @@
+"""
+============================================================
+Indexed Full-Text Search for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides an indexed search backend that replaces DRF's `SearchFilter`
+(an OR of `ILIKE '%term%'` over several, often joined, columns) for models
+that keep a denormalized search document.
+
+Key Components:
+    - normalize_search_text(): Persian/Arabic aware text normalization applied
+      identically when indexing and when querying
+    - SearchDocumentMixin: Model mixin that rebuilds `search_document` from
+      `search_document_fields` on every save
+    - Search backends:
+        • PostgreSQL: generated `tsvector` column with a GIN index, ranked
+          with `ts_rank`
+        • SQLite: FTS5 external-content table kept in sync by triggers,
+          ranked with `bm25`
+        • Any other database: substring match on the normalized document
+    - IndexedSearchFilter: Drop-in `SearchFilter` replacement that uses the
+      backend for models with a search document, orders by relevance unless
+      an explicit `?ordering=` is given, and falls back to `SearchFilter`
+      for every other model
+
+Usage Example:
+--------------
+    class Facility(SearchDocumentMixin, models.Model):
+        search_document_fields = ["name", "city", "type__title"]
+        search_document = models.TextField(blank=True, editable=False)
+
+License: GPLv2
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from apps.common.cache import bump_generation_on_commit
+
+SEARCH_DOCUMENT_FIELD = "search_document"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+# Arabic code points that Persian keyboards and imported data use
+# interchangeably with their Persian counterparts.
+_CHARACTER_MAP = str.maketrans(
+    {
+        "ي": "ی",  # Arabic Yeh -> Persian Yeh
+        "ى": "ی",  # Alef Maksura -> Persian Yeh
+        "ك": "ک",  # Arabic Kaf -> Persian Keheh
+        "ة": "ه",  # Teh Marbuta -> Heh
+        "ۀ": "ه",  # Heh with Yeh above -> Heh
+        "آ": "ا",  # Alef with Madda -> Alef
+        "أ": "ا",  # Alef with Hamza above -> Alef
+        "إ": "ا",  # Alef with Hamza below -> Alef
+        "ٱ": "ا",  # Alef Wasla -> Alef
+        "ؤ": "و",  # Waw with Hamza -> Waw
+        **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian
+        **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic
+    }
+)
+
+# Zero-width (non-)joiners, tatweel and Arabic diacritics carry no meaning for
+# matching: "بیمارستان‌ها" and "بیمارستانها" must index to the same token.
+_IGNORED_CHARACTERS = re.compile("[\u200c\u200d\u0640\u064b-\u065f\u0670]")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_search_text(value):
+    """
+    Normalize `value` for indexing and querying.
+
+    Unifies Arabic/Persian letter variants and digits, drops zero-width
+    joiners and diacritics, case-folds, and collapses everything that is
+    not a word character into single spaces.
+    """
+    if not value:
+        return ""
+    value = _IGNORED_CHARACTERS.sub("", str(value).translate(_CHARACTER_MAP))
+    return " ".join(_TOKEN.findall(value.casefold()))
+
+
+def search_tokens(value):
+    """
+    Split a raw search query into normalized tokens.
+    """
+    return normalize_search_text(value).split()
+
+
+def build_search_document(instance, fields):
+    """
+    Return the normalized search document of `instance`.
+
+    `fields` may traverse relations with `__` (e.g. `type__title`); empty
+    relations contribute nothing.
+    """
+    parts = []
+    for path in fields:
+        value = instance
+        for name in path.split(LOOKUP_SEP):
+            value = getattr(value, name, None)
+            if value is None:
+                break
+        parts.append(normalize_search_text(value))
+    return " ".join(part for part in parts if part)
+
+
+def refresh_search_documents(queryset, batch_size=500):
+    """
+    Rebuild the search documents of every row in `queryset`.
+
+    Used when data that documents denormalize (e.g. a related title) changes.
+    `bulk_update` sends no signals, so the model's cache generation is bumped
+    here for anything derived from the old documents.
+    """
+    model = queryset.model
+    related = sorted(
+        {
+            path.rsplit(LOOKUP_SEP, 1)[0]
+            for path in model.search_document_fields
+            if LOOKUP_SEP in path
+        }
+    )
+    batch, changed = [], False
+    for instance in queryset.select_related(*related).iterator(chunk_size=batch_size):
+        document = build_search_document(instance, model.search_document_fields)
+        if document != getattr(instance, SEARCH_DOCUMENT_FIELD):
+            setattr(instance, SEARCH_DOCUMENT_FIELD, document)
+            batch.append(instance)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, [SEARCH_DOCUMENT_FIELD])
+            batch, changed = [], True
+    if batch:
+        model.objects.bulk_update(batch, [SEARCH_DOCUMENT_FIELD])
+        changed = True
+    if changed:
+        bump_generation_on_commit(model, using=queryset.db)
+
+
+class SearchDocumentMixin:
+    """
+    Model mixin that maintains a denormalized, normalized search document.
+
+    Subclasses declare:
+        - `search_document_fields`: field paths that make up the document
+        - `search_document`: a `TextField(blank=True, editable=False)`
+    """
+
+    search_document_fields = []
+
+    def refresh_search_document(self):
+        """
+        Rebuild `search_document` and return True if it changed.
+        """
+        document = build_search_document(self, self.search_document_fields)
+        changed = document != getattr(self, SEARCH_DOCUMENT_FIELD)
+        setattr(self, SEARCH_DOCUMENT_FIELD, document)
+        return changed
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {
+            path.split(LOOKUP_SEP)[0] for path in self.search_document_fields
+        }.intersection(update_fields):
+            # Partial save of fields the document does not include.
+            super().save(*args, **kwargs)
+            return
+
+        changed = self.refresh_search_document()
+        if changed and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, SEARCH_DOCUMENT_FIELD}
+        super().save(*args, **kwargs)
+
+
+class BaseSearchBackend:
+    """
+    Substring search over the normalized document; works on any database.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self, model):
+        """
+        Create the database objects backing the index (idempotent).
+        """
+
+    def uninstall(self, model):
+        """
+        Drop the database objects created by `install`.
+        """
+
+    def search(self, queryset, tokens):
+        """
+        Filter `queryset` to rows matching every token and annotate it with a
+        `search_rank` where higher is more relevant.
+
+        Indexed backends match tokens as word prefixes; this fallback matches
+        them anywhere in the document and ranks every row equally.
+        """
+        for token in tokens:
+            queryset = queryset.filter(**{f"{SEARCH_DOCUMENT_FIELD}__contains": token})
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def _column(self, model, column):
+        quote = self.connection.ops.quote_name
+        return f"{quote(model._meta.db_table)}.{quote(column)}"
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Generated `tsvector` column over the search document plus a GIN index.
+    """
+
+    def install(self, model):
+        quote = self.connection.ops.quote_name
+        table = model._meta.db_table
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ADD COLUMN IF NOT EXISTS "
+                f"{quote(SEARCH_VECTOR_COLUMN)} tsvector GENERATED ALWAYS AS "
+                f"(to_tsvector('simple', coalesce({quote(SEARCH_DOCUMENT_FIELD)}, ''))) "
+                "STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(table + '_search_gin')} "
+                f"ON {quote(table)} USING GIN ({quote(SEARCH_VECTOR_COLUMN)})"
+            )
+
+    def uninstall(self, model):
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {quote(model._meta.db_table)} "
+                f"DROP COLUMN IF EXISTS {quote(SEARCH_VECTOR_COLUMN)}"
+            )
+
+    def search(self, queryset, tokens):
+        vector = self._column(queryset.model, SEARCH_VECTOR_COLUMN)
+        query = " & ".join(f"{token}:*" for token in tokens)
+        return queryset.filter(
+            RawSQL(
+                f"{vector} @@ to_tsquery('simple', %s)",
+                [query],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({vector}, to_tsquery('simple', %s))",
+                [query],
+                output_field=FloatField(),
+            )
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 external-content table mirrored from the search document by triggers.
+    """
+
+    def _fts_table(self, model):
+        return f"{model._meta.db_table}_fts"
+
+    def install(self, model):
+        quote = self.connection.ops.quote_name
+        table = model._meta.db_table
+        fts = self._fts_table(model)
+        pk = model._meta.pk.column
+        document = SEARCH_DOCUMENT_FIELD
+        insert = (
+            f"INSERT INTO {quote(fts)}(rowid, {document}) "
+            f"VALUES (new.{quote(pk)}, new.{document});"
+        )
+        delete = (
+            f"INSERT INTO {quote(fts)}({quote(fts)}, rowid, {document}) "
+            f"VALUES ('delete', old.{quote(pk)}, old.{document});"
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [fts],
+            )
+            created = cursor.fetchone() is None
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {quote(fts)} USING fts5("
+                f"{document}, content={quote(table)}, content_rowid={quote(pk)}, "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            # Triggers are dropped whenever Django rebuilds the table during a
+            # migration, so they are (re)created on every install.
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(fts + '_ai')} "
+                f"AFTER INSERT ON {quote(table)} BEGIN {insert} END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(fts + '_ad')} "
+                f"AFTER DELETE ON {quote(table)} BEGIN {delete} END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(fts + '_au')} "
+                f"AFTER UPDATE OF {document} ON {quote(table)} "
+                f"BEGIN {delete} {insert} END"
+            )
+            if created:
+                cursor.execute(
+                    f"INSERT INTO {quote(fts)}({quote(fts)}) VALUES ('rebuild')"
+                )
+
+    def uninstall(self, model):
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(self._fts_table(model))}")
+
+    def search(self, queryset, tokens):
+        quote = self.connection.ops.quote_name
+        fts = quote(self._fts_table(queryset.model))
+        pk = self._column(queryset.model, queryset.model._meta.pk.column)
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return queryset.filter(
+            RawSQL(
+                f"{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+                [match],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            # bm25() is lower-is-better; negate it so that higher ranks first.
+            search_rank=RawSQL(
+                f"(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s "
+                f"AND rowid = {pk})",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+
+def get_search_backend(using="default"):
+    """
+    Return the search backend for the database alias `using`.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend(connection)
+    if connection.vendor == "sqlite" and _sqlite_has_fts5(connection):
+        return SQLiteSearchBackend(connection)
+    return BaseSearchBackend(connection)
+
+
+_fts5_support = {}
+
+
+def _sqlite_has_fts5(connection):
+    # Compile options belong to the linked SQLite library, so ask only once.
+    if connection.alias not in _fts5_support:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            options = {row[0] for row in cursor.fetchall()}
+        _fts5_support[connection.alias] = "ENABLE_FTS5" in options
+    return _fts5_support[connection.alias]
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    `SearchFilter` that searches the indexed search document when available.
+
+    - Models using `SearchDocumentMixin` are searched through the database's
+      search backend, and results are ranked by relevance unless the client
+      picked an explicit `?ordering=`
+    - Other models keep the stock `search_fields` behavior
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not issubclass(queryset.model, SearchDocumentMixin):
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = search_tokens(request.query_params.get(self.search_param, ""))
+        if not tokens:
+            return queryset
+
+        ordering = list(queryset.query.order_by) or list(
+            queryset.model._meta.ordering
+        )
+        queryset = get_search_backend(queryset.db).search(queryset, tokens)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by("-search_rank", *ordering)
+        return queryset
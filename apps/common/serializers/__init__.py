@@ -1,5 +1,6 @@
-from .serializers import BaseModelSerializer
+from .serializers import BaseListSerializer, BaseModelSerializer
 
 __all__ = [
+    "BaseListSerializer",
     "BaseModelSerializer",
 ]
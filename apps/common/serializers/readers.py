@@ -0,0 +1,226 @@
+"""
+================================================================================
+Compiled Serializer Readers for H.CORE Project
+================================================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This module implements the fast read path of `BaseModelSerializer`
+(`Meta.fast_read = True`).
+
+DRF's `Serializer.to_representation` resolves every field of every row
+through `get_attribute()` (source walking, exception handling, `PKOnlyObject`
+wrapping) before calling its `to_representation()`. For plain model columns
+that is most of the CPU time of a list response. Here the readable fields
+are analyzed once per serializer class and field set, into a plan of:
+    - the model attribute (or `values_list()` column) each field reads
+    - the converter its `to_representation()` boils down to: none for
+      primary keys and `ReadOnlyField`, `str` / `int` / `bool` for the
+      plain DRF fields, and the field's own bound method for anything else
+      (datetimes, `ImageField` URLs, cached lookups...)
+Fields the plan cannot express (nested serializers, method fields, dotted
+sources...) keep the regular DRF code path, field by field.
+
+Sparse fieldsets (`?fields=` / `?exclude=`) let clients choose the field
+sets, so only the `PLAN_CACHE_SIZE` most recently used plans are kept.
+
+When every field maps to a column, lists serialized straight from a queryset
+are read with `values_list()` tuples, skipping model instances entirely.
+
+The output is identical to DRF's: same keys, order, values and `None`
+handling.
+
+License: GPLv2
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+# Local lookup fields
+from apps.common.lookups import CachedLookupField
+
+# Field kinds of a compiled plan
+KEY = "key"  # a foreign key rendered as its raw id
+PLAIN = "plain"  # a local column
+FILE = "file"  # a file column; `values_list()` gives the name, not a FieldFile
+GENERIC = "generic"  # regular DRF code path
+
+# `to_representation()` implementations with a cheaper equivalent
+_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.ReadOnlyField.to_representation: None,
+}
+
+# Compiled plans kept per process, least recently used evicted first
+PLAN_CACHE_SIZE = 256
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def _plan_field(model, field):
+    """
+    Return `(kind, attname)` for one readable serializer field.
+    """
+    source = field.source
+    if source == "*" or "." in source or isinstance(field, serializers.BaseSerializer):
+        return GENERIC, None
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return GENERIC, None
+    if not model_field.concrete or model_field.many_to_many:
+        return GENERIC, None
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None or not model_field.many_to_one:
+            return GENERIC, None
+        return KEY, model_field.attname
+    if isinstance(field, CachedLookupField):
+        return PLAIN, model_field.attname
+    if isinstance(field, serializers.RelatedField) or model_field.is_relation:
+        return GENERIC, None
+    if isinstance(field, serializers.FileField):
+        if not isinstance(model_field, models.FileField):
+            return GENERIC, None
+        return FILE, model_field.attname
+    return PLAIN, model_field.attname
+
+
+def get_plan(serializer):
+    """
+    Return the plan of `serializer`'s readable fields, cached per serializer
+    class and field set (LRU): a list of `(field_name, kind, attname)`.
+    """
+    fields = list(serializer._readable_fields)
+    key = (
+        serializer.__class__,
+        tuple((field.field_name, type(field), field.source) for field in fields),
+    )
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+
+    model = serializer.Meta.model
+    plan = [(field.field_name, *_plan_field(model, field)) for field in fields]
+    with _plans_lock:
+        _plans[key] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _get_converter(field, model_field):
+    method = type(field).to_representation
+    if method is serializers.BooleanField.to_representation and isinstance(
+        model_field, models.BooleanField
+    ):
+        # Model booleans are real booleans: `BooleanField` returns them as is.
+        return bool
+    return _CONVERTERS.get(method, field.to_representation)
+
+
+class CompiledReader:
+    """
+    Row -> dict function of one serializer instance (its context bound).
+    """
+
+    def __init__(self, serializer):
+        plan = get_plan(serializer)
+        fields = serializer.fields
+        self.model = serializer.Meta.model
+        self.steps = []
+        self.columns = []
+        for name, kind, attname in plan:
+            field = fields[name]
+            if kind == GENERIC:
+                self.steps.append((name, kind, field, None))
+                self.columns = None
+                continue
+            if kind == KEY:
+                convert = None
+            else:
+                model_field = self.model._meta.get_field(attname)
+                convert = _get_converter(field, model_field)
+            self.steps.append((name, kind, attname, convert))
+            if self.columns is not None:
+                self.columns.append(attname)
+
+    @property
+    def reads_columns(self):
+        """
+        Whether `from_values()` can serve every field.
+        """
+        return self.columns is not None
+
+    def from_instance(self, instance):
+        ret = {}
+        for name, kind, target, convert in self.steps:
+            if kind == GENERIC:
+                try:
+                    attribute = target.get_attribute(instance)
+                except SkipField:
+                    continue
+                if isinstance(attribute, PKOnlyObject):
+                    check_for_none = attribute.pk
+                else:
+                    check_for_none = attribute
+                if check_for_none is None:
+                    ret[name] = None
+                else:
+                    ret[name] = target.to_representation(attribute)
+                continue
+
+            value = getattr(instance, target)
+            if value is None:
+                ret[name] = None
+            elif convert is None:
+                ret[name] = value
+            else:
+                ret[name] = convert(value)
+        return ret
+
+    def from_values(self, queryset):
+        """
+        Yield the representations of `queryset` read with `values_list()`.
+        """
+        steps = []
+        for name, kind, attname, convert in self.steps:
+            if kind == FILE:
+                model_field = self.model._meta.get_field(attname)
+                convert = self._wrap_file(model_field, convert)
+            steps.append((name, convert))
+
+        rows = queryset.prefetch_related(None).values_list(*self.columns)
+        for row in rows:
+            ret = {}
+            for (name, convert), value in zip(steps, row):
+                if value is None:
+                    ret[name] = None
+                elif convert is None:
+                    ret[name] = value
+                else:
+                    ret[name] = convert(value)
+            yield ret
+
+    def _wrap_file(self, model_field, convert):
+        # The field expects the `FieldFile` a model instance would hold.
+        def convert_file(name):
+            return convert(model_field.attr_class(None, model_field, name))
+
+        return convert_file
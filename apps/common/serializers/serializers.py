@@ -14,9 +14,25 @@ Description:
 This module provides reusable base classes for Django REST Framework serializers.
 
 Key Features:
-    - Automatic slug generation based on configurable fields (`slug_fields` in Meta)
+    - Automatic slug generation based on configurable fields (`slug_fields` in Meta),
+      made unique with `-2`, `-3`... suffixes (`apps.common.slugs`)
     - Proper handling of ManyToMany relationships during both create and update
     - Standard inclusion of common fields such as `slug`, `created_at`, and `updated_at`
+    - Sparse fieldsets (`fields=` / `exclude=` arguments) that also report
+      which model columns the trimmed representation no longer needs
+    - On-demand expansion (`expand=` argument) of related objects declared in
+      `Meta.expandable_fields`
+    - Foreign keys to small reference tables listed in
+      `Meta.cached_lookup_fields` are validated and expanded from in-process
+      lookup tables (`apps.common.lookups`) instead of queries and joins
+    - `many=True` builds a `BaseListSerializer`, which validates items one by
+      one (collecting per-item errors) and writes them with `bulk_create` /
+      `bulk_update` in batches
+    - Updates of `DirtyFieldsMixin` models (`apps.common.tracking`) write only
+      the changed columns, and nothing at all when no value changed
+    - Opt-in fast reads (`Meta.fast_read = True`): representations are built
+      by a reader compiled once per serializer class (`readers.py`), straight
+      from `values_list()` rows when a whole queryset is serialized
 
 These components are intended to be subclassed by app-specific serializers in
 order to promote DRY principles, enforce consistency, and simplify CRUD logic
@@ -26,7 +42,180 @@ License: GPLv2
 """
 
 from rest_framework import serializers
-from django.utils.text import slugify
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+# Local cache, lookup, reader, search and slug utilities
+from apps.common.cache import bump_generation_on_commit
+from apps.common.lookups import CachedLookupField, CachedPrimaryKeyRelatedField
+from apps.common.search import SearchDocumentMixin
+from apps.common.serializers.readers import CompiledReader
+from apps.common.slugs import (
+    SLUG_ALLOCATION_ATTEMPTS,
+    allocate_slugs,
+    build_slug_from,
+)
+from apps.common.tracking import DirtyFieldsMixin
+
+
+class BaseListSerializer(serializers.ListSerializer):
+    """
+    List serializer for bulk writes of `BaseModelSerializer` children.
+
+    Unlike `ListSerializer.is_valid()`, `validate_items()` keeps the valid
+    items when others fail, so callers can write what is valid and report
+    the rest. Writes skip per-row `save()` calls, so the child's slug and
+    search document logic is applied here and the model's cache generation
+    is bumped once afterwards (no `post_save` signals are sent).
+
+    With the child's fast read path, querysets whose fields are all plain
+    columns are read with `values_list()` instead of model instances.
+    """
+
+    def to_representation(self, data):
+        reader = self.child.get_fast_reader()
+        if (
+            reader is not None
+            and reader.reads_columns
+            and isinstance(data, (models.QuerySet, models.Manager))
+        ):
+            return list(reader.from_values(data.all()))
+        return super().to_representation(data)
+
+    def validate_items(self):
+        """
+        Validate `initial_data` item by item.
+
+        Returns a list with one `(validated_data, errors)` pair per item,
+        exactly one of which is None. For updates, `instance` must be a list
+        of instances aligned with the items.
+        """
+        results = []
+        for index, item in enumerate(self.initial_data):
+            self.child.instance = self.instance[index] if self.instance else None
+            self.child.initial_data = item
+            try:
+                results.append((self.child.run_validation(item), None))
+            except serializers.ValidationError as exc:
+                results.append((None, exc.detail))
+        self.child.instance = None
+        return results
+
+    def bulk_create(self, validated_items, batch_size=500):
+        """
+        Insert the validated items with `bulk_create` and return the instances.
+        """
+        model = self.child.Meta.model
+        instances, slug_bases, m2m_items = [], [], []
+        for validated_data in validated_items:
+            validated_data, m2m_data = self.child._pop_m2m_fields(dict(validated_data))
+            instance = model(**validated_data)
+            slug_bases.append(self.child._get_slug_base(instance, validated_data))
+            if isinstance(instance, SearchDocumentMixin):
+                instance.refresh_search_document()
+            instances.append(instance)
+            m2m_items.append(m2m_data)
+
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            self._allocate_slugs(instances, slug_bases)
+            try:
+                with transaction.atomic():
+                    model._default_manager.bulk_create(
+                        instances, batch_size=batch_size
+                    )
+                    for instance, m2m_data in zip(instances, m2m_items):
+                        for field_name, values in m2m_data.items():
+                            getattr(instance, field_name).set(values)
+                break
+            except IntegrityError:
+                # A concurrent writer took one of the allocated slugs.
+                if not any(slug_bases) or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
+
+        bump_generation_on_commit(model)
+        return instances
+
+    def bulk_update(self, instances, validated_items, batch_size=500):
+        """
+        Apply the validated items to `instances` with `bulk_update`.
+
+        For `DirtyFieldsMixin` models, only changed columns are written and
+        instances without changes are left out.
+        """
+        model = self.child.Meta.model
+        fields, slug_bases, m2m_items, changed = set(), [], [], []
+        now = timezone.now()
+        for instance, validated_data in zip(instances, validated_items):
+            validated_data, m2m_data = self.child._pop_m2m_fields(dict(validated_data))
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            slug_base = self.child._get_slug_base(instance, validated_data)
+            slug_bases.append(slug_base)
+            m2m_items.append(m2m_data)
+
+            dirty = None
+            if isinstance(instance, DirtyFieldsMixin):
+                # Only the columns some instance actually changed.
+                dirty = instance.get_dirty_fields()
+                if dirty == [] and slug_base is None:
+                    continue
+            fields.update(validated_data if dirty is None else dirty)
+            changed.append(instance)
+
+            if isinstance(instance, SearchDocumentMixin):
+                instance.refresh_search_document()
+                fields.add("search_document")
+            # `bulk_update` does not run `pre_save`, so set `auto_now` here.
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    setattr(instance, field.attname, now)
+                    fields.add(field.name)
+
+        if any(base is not None for base in slug_bases):
+            fields.add("slug")
+
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            self._allocate_slugs(instances, slug_bases)
+            try:
+                with transaction.atomic():
+                    if changed and fields:
+                        model._default_manager.bulk_update(
+                            changed, sorted(fields), batch_size=batch_size
+                        )
+                    for instance, m2m_data in zip(instances, m2m_items):
+                        for field_name, values in m2m_data.items():
+                            getattr(instance, field_name).set(values)
+                break
+            except IntegrityError:
+                if "slug" not in fields or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
+
+        for instance in changed:
+            if isinstance(instance, DirtyFieldsMixin):
+                instance._store_loaded_state()
+        if changed or any(m2m_items):
+            bump_generation_on_commit(model)
+        return instances
+
+    def _allocate_slugs(self, instances, slug_bases):
+        """
+        Give unique slugs to the instances that need one, with one query.
+        """
+        pending = [
+            (instance, base)
+            for instance, base in zip(instances, slug_bases)
+            if base is not None
+        ]
+        if not pending:
+            return
+        slugs = allocate_slugs(
+            self.child.Meta.model,
+            [base for _, base in pending],
+            exclude_pks=[instance.pk for instance, _ in pending if instance.pk],
+        )
+        for (instance, _), slug in zip(pending, slugs):
+            instance.slug = slug
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -34,12 +223,145 @@ class BaseModelSerializer(serializers.ModelSerializer):
     Base serializer with:
       - Automatic slug generation (if `slug_fields` is provided in Meta)
       - Correct handling of ManyToMany fields during create and update
+      - Sparse fieldsets: `fields=[...]` keeps only the named fields and
+        `exclude=[...]` drops fields; unknown names are ignored
+      - Expansion: `expand=[...]` replaces the named fields (usually primary
+        keys) with the nested serializers declared in Meta, e.g.
+
+            class Meta:
+                expandable_fields = {"type": TypeSerializer}
+
+        Values may also be `(serializer_class, kwargs)` tuples. Expanded
+        fields are read-only.
+      - Cached lookups: foreign keys named in `Meta.cached_lookup_fields`
+        validate against, and expand from, per-process copies of their
+        (small, rarely changing) related tables
+      - Fast reads: with `Meta.fast_read = True`, `to_representation` runs a
+        reader compiled for the serializer's fields instead of DRF's
+        per-field loop; the output is the same
     """
 
     slug = serializers.CharField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
 
+    def __init__(self, *args, fields=None, exclude=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._dropped_sources = set()
+        if expand:
+            self._expand_fields(expand)
+        if fields is not None or exclude is not None:
+            self._select_fields(fields, exclude)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Build a `BaseListSerializer` unless Meta names another list class.
+        """
+        list_kwargs = {}
+        for key in serializers.LIST_SERIALIZER_KWARGS_REMOVE:
+            value = kwargs.pop(key, None)
+            if value is not None:
+                list_kwargs[key] = value
+        list_kwargs["child"] = cls(*args, **kwargs)
+        list_kwargs.update(
+            (key, value)
+            for key, value in kwargs.items()
+            if key in serializers.LIST_SERIALIZER_KWARGS
+        )
+        meta = getattr(cls, "Meta", None)
+        list_serializer_class = getattr(
+            meta, "list_serializer_class", BaseListSerializer
+        )
+        return list_serializer_class(*args, **list_kwargs)
+
+    def get_fast_reader(self):
+        """
+        Return the compiled reader of this serializer, or None when
+        `Meta.fast_read` is off.
+        """
+        if not getattr(self.Meta, "fast_read", False):
+            return None
+        if not hasattr(self, "_fast_reader"):
+            self._fast_reader = CompiledReader(self)
+        return self._fast_reader
+
+    def to_representation(self, instance):
+        reader = self.get_fast_reader()
+        if reader is None:
+            return super().to_representation(instance)
+        return reader.from_instance(instance)
+
+    def build_relational_field(self, field_name, relation_info):
+        field_class, field_kwargs = super().build_relational_field(
+            field_name, relation_info
+        )
+        if field_name in getattr(self.Meta, "cached_lookup_fields", ()) and (
+            field_class is serializers.PrimaryKeyRelatedField
+        ):
+            field_class = CachedPrimaryKeyRelatedField
+        return field_class, field_kwargs
+
+    def _expand_fields(self, expand):
+        """
+        Swap requested fields for their nested `Meta.expandable_fields`.
+        """
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        cached = getattr(self.Meta, "cached_lookup_fields", ())
+        for name in expand:
+            if name not in expandable or name not in self.fields:
+                continue
+            serializer_class, options = expandable[name], {}
+            if isinstance(serializer_class, (list, tuple)):
+                serializer_class, options = serializer_class
+            source = self.fields[name].source
+            if name in cached and "." not in source:
+                model_field = self.Meta.model._meta.get_field(source)
+                self.fields[name] = CachedLookupField(
+                    serializer_class,
+                    model_field.related_model,
+                    serializer_options=options,
+                    source=model_field.attname,
+                )
+                continue
+            if source != name:
+                options = {"source": source, **options}
+            self.fields[name] = serializer_class(read_only=True, **options)
+
+    def _select_fields(self, fields, exclude):
+        """
+        Trim `self.fields` to the requested sparse fieldset.
+        """
+        keep = set(self.fields) if fields is None else set(fields)
+        keep.difference_update(exclude or ())
+        for name in list(self.fields):
+            if name not in keep:
+                self._dropped_sources.add(self.fields.pop(name).source)
+
+    def get_deferrable_fields(self, keep=()):
+        """
+        Return model fields that only dropped serializer fields read, so views
+        can `defer()` them instead of loading unused (possibly large) columns.
+
+        Fields in `keep` are never returned (e.g. the columns a keyset
+        paginator reads from the rows).
+        """
+        kept = {field.source.split(".")[0] for field in self.fields.values()}
+        kept.update(keep)
+        if "*" in kept:
+            return []
+
+        model = self.Meta.model
+        deferrable = []
+        for source in sorted(self._dropped_sources - kept):
+            try:
+                field = model._meta.get_field(source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.primary_key and not field.many_to_many:
+                deferrable.append(field.name)
+        return deferrable
+
     def _pop_m2m_fields(self, validated_data):
         """
         Extract ManyToMany fields from validated_data.
@@ -52,22 +374,56 @@ class BaseModelSerializer(serializers.ModelSerializer):
                 m2m_fields[field.name] = validated_data.pop(field.name)
         return validated_data, m2m_fields
 
-    def _generate_slug(self, instance, validated_data):
+    def _get_slug_base(self, instance, validated_data):
         """
-        If `slug_fields` is defined in Meta, generate a slug from them.
+        Return the slug to derive from `slug_fields` (defined in Meta) before
+        collision suffixes, or None if `instance` needs no generated slug.
         """
         slug_fields = getattr(self.Meta, "slug_fields", None)
         if slug_fields and hasattr(instance, "slug") and not getattr(instance, "slug"):
-            slug_value = "-".join(
-                str(validated_data.get(field, "")) for field in slug_fields
-            )
-            instance.slug = slugify(slug_value, allow_unicode=True)
+            max_length = instance._meta.get_field("slug").max_length
+            return build_slug_from(validated_data, slug_fields, max_length)
+        return None
+
+    def _generate_slug(self, instance, validated_data):
+        """
+        If `slug_fields` is defined in Meta, generate a unique slug from them.
+        Returns True if a slug was generated.
+        """
+        base = self._get_slug_base(instance, validated_data)
+        if base is None:
+            return False
+        instance.slug = allocate_slugs(
+            type(instance), [base], exclude_pks=[instance.pk] if instance.pk else ()
+        )[0]
+        return True
+
+    def _save(self, instance, validated_data):
+        """
+        Save `instance`, generating its slug; a slug taken concurrently
+        between allocation and insert is allocated again.
+
+        Tracked instances (`DirtyFieldsMixin`) only write their changed
+        fields, or nothing when no field changed.
+        """
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            generated = self._generate_slug(instance, validated_data)
+            try:
+                with transaction.atomic():
+                    if isinstance(instance, DirtyFieldsMixin):
+                        instance.save_changes()
+                    else:
+                        instance.save()
+                return
+            except IntegrityError:
+                if not generated or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
+                instance.slug = ""
 
     def create(self, validated_data):
         validated_data, m2m_data = self._pop_m2m_fields(validated_data)
         instance = self.Meta.model(**validated_data)
-        self._generate_slug(instance, validated_data)
-        instance.save()
+        self._save(instance, validated_data)
 
         for field_name, values in m2m_data.items():
             getattr(instance, field_name).set(values)
@@ -80,8 +436,7 @@ class BaseModelSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        self._generate_slug(instance, validated_data)
-        instance.save()
+        self._save(instance, validated_data)
 
         for field_name, values in m2m_data.items():
             getattr(instance, field_name).set(values)
@@ -0,0 +1,112 @@
+"""
+============================================================
+Slug Utilities for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides the slug builder shared by `BaseModelSerializer` and bulk
+import tools, so that a row gets the same slug whichever path writes it, and
+the allocator that makes generated slugs unique.
+
+Allocation:
+    - `allocate_slugs()` resolves a whole batch of base slugs with a single
+      query: every taken slug starting with one of the bases (an indexed
+      prefix scan on the unique slug column)
+    - Collisions get the first free `-2`, `-3`, ... suffix, also avoiding the
+      slugs allocated earlier in the same batch
+    - Two concurrent writers can still pick the same free slug; the unique
+      constraint rejects the second insert and callers allocate again
+      (`SLUG_ALLOCATION_ATTEMPTS`)
+
+Usage Example:
+--------------
+    build_slug(["Imam Khomeini", "Tehran"])      # -> "imam-khomeini-tehran"
+    build_slug_from(data, ["name", "city"], 50)
+    allocate_slugs(Facility, ["sina-tehran", "sina-tehran"])
+    # -> ["sina-tehran-3", "sina-tehran-4"] if "sina-tehran(-2)" are taken
+
+License: GPLv2
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Room kept at the end of truncated slugs for a "-<n>" collision suffix
+SLUG_SUFFIX_RESERVE = 6
+
+# Times a write retries with freshly allocated slugs after a unique conflict
+SLUG_ALLOCATION_ATTEMPTS = 3
+
+
+def build_slug(values, max_length=None):
+    """
+    Join `values` with dashes and slugify them (Unicode letters are kept).
+    """
+    slug = slugify("-".join(str(value) for value in values), allow_unicode=True)
+    if max_length:
+        slug = slug[:max_length].rstrip("-")
+    return slug
+
+
+def build_slug_from(data, slug_fields, max_length=None):
+    """
+    Build the slug of a mapping (e.g. validated data) from its `slug_fields`.
+    """
+    return build_slug((data.get(field, "") for field in slug_fields), max_length)
+
+
+def _with_suffix(base, number, max_length):
+    suffix = f"-{number}" if number > 1 else ""
+    if max_length and len(base) + len(suffix) > max_length:
+        base = base[: max_length - len(suffix)].rstrip("-")
+    return base + suffix
+
+
+def allocate_slugs(
+    model, bases, field_name="slug", exclude_pks=(), using=None, reserved=()
+):
+    """
+    Return a unique slug for every base in `bases`, in order.
+
+    Rows in `exclude_pks` (e.g. the instance being updated) do not count as
+    collisions; slugs in `reserved` (e.g. explicit slugs of the same batch,
+    not written yet) do. Empty bases fall back to the model name.
+    """
+    max_length = model._meta.get_field(field_name).max_length
+    bases = [base or model._meta.model_name for base in bases]
+    if not bases:
+        return []
+
+    # Truncated candidates share this prefix too, so one scan covers them.
+    prefixes = {
+        base[: max_length - SLUG_SUFFIX_RESERVE] if max_length else base
+        for base in bases
+    }
+    queryset = model._default_manager.db_manager(using).filter(
+        reduce(or_, (Q(**{f"{field_name}__startswith": p}) for p in prefixes))
+    )
+    if exclude_pks:
+        queryset = queryset.exclude(pk__in=list(exclude_pks))
+    taken = set(queryset.order_by().values_list(field_name, flat=True))
+    taken.update(reserved)
+
+    slugs = []
+    for base in bases:
+        number = 1
+        slug = _with_suffix(base, number, max_length)
+        while slug in taken:
+            number += 1
+            slug = _with_suffix(base, number, max_length)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
@@ -0,0 +1,180 @@
+"""
+============================================================
+Dirty Field Tracking for H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides `DirtyFieldsMixin`, a model mixin that knows which fields
+changed since the instance was loaded, and the `changes_saved` signal.
+
+How it works:
+    - `from_db()` keeps the loaded column values; `refresh_from_db()` and
+      `save()` keep them current, so the comparison is always against what
+      the database holds
+    - `get_dirty_fields()` compares them with the current attribute values
+      (fields that were deferred and never loaded count as changed once
+      assigned)
+    - `save_changes()` writes only the changed fields (plus `auto_now`
+      fields such as `updated_at`) with `save(update_fields=...)`, and does
+      not write at all when nothing changed
+    - Every save sends `changes_saved` with the names of the fields it
+      changed, so receivers (cache invalidation, denormalization...) can
+      ignore saves that changed nothing they depend on. `auto_now` fields
+      count as changed whenever the row is written, so a full `save()`
+      without other changes still reports its new `updated_at`
+
+Usage Example:
+--------------
+    class Facility(DirtyFieldsMixin, models.Model):
+        ...
+
+    facility.phone_number = "+98 21 1234"
+    facility.get_dirty_fields()        # -> ["phone_number"]
+    facility.save_changes()            # UPDATE phone_number, updated_at
+
+    @receiver(changes_saved, sender=Facility)
+    def on_change(sender, instance, created, changed_fields, **kwargs):
+        ...
+
+License: GPLv2
+"""
+
+import copy
+
+from django.db.models.fields.files import FieldFile
+from django.dispatch import Signal
+
+# Sent after a `DirtyFieldsMixin` model is saved, with `instance`, `created`
+# and `changed_fields`: a frozenset of field names, or None when the
+# previous state is unknown (new rows, instances not loaded from the
+# database).
+changes_saved = Signal()
+
+
+def _snapshot(value):
+    # Mutable values (e.g. JSON, files) could change in place without
+    # reassignment; `FieldFile` compares equal to its name.
+    if isinstance(value, FieldFile):
+        return value.name
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+class DirtyFieldsMixin:
+    """
+    Model mixin tracking changes against the state loaded from the database.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._store_loaded_state()
+        return instance
+
+    def _store_loaded_state(self, fields=None):
+        """
+        Remember the current values of `fields` (default: every loaded
+        concrete field) as the database state.
+        """
+        deferred = self.get_deferred_fields()
+        state = getattr(self, "_loaded_state", None)
+        if state is None:
+            state = self._loaded_state = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is not None and (
+                field.name not in fields and field.attname not in fields
+            ):
+                continue
+            state[field.attname] = _snapshot(getattr(self, field.attname))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if getattr(self, "_loaded_state", None) is not None:
+            self._store_loaded_state(fields)
+
+    def get_dirty_fields(self):
+        """
+        Return the names of the fields changed since the instance was
+        loaded, or None if it was not loaded from the database.
+        """
+        state = getattr(self, "_loaded_state", None)
+        if state is None or self._state.adding:
+            return None
+
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.attname not in state:
+                # Deferred when loaded: changed only if assigned since.
+                if field.attname in self.__dict__:
+                    dirty.append(field.name)
+                continue
+            if getattr(self, field.attname) != state[field.attname]:
+                dirty.append(field.name)
+        return dirty
+
+    def has_changes(self):
+        dirty = self.get_dirty_fields()
+        return dirty is None or bool(dirty)
+
+    def _auto_now_fields(self):
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+
+    def save_changes(self, **kwargs):
+        """
+        Save only the changed fields and the `auto_now` fields.
+
+        Returns False, without writing, when nothing changed. Instances not
+        loaded from the database are saved in full.
+        """
+        dirty = self.get_dirty_fields()
+        if dirty is None:
+            self.save(**kwargs)
+            return True
+        if not dirty:
+            return False
+
+        auto_now = [name for name in self._auto_now_fields() if name not in dirty]
+        self.save(update_fields=[*dirty, *auto_now], **kwargs)
+        return True
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        dirty = self.get_dirty_fields()
+        update_fields = kwargs.get("update_fields")
+        if dirty is not None and update_fields is not None:
+            dirty = [name for name in dirty if name in update_fields]
+        if dirty is not None and (update_fields is None or update_fields):
+            # The UPDATE runs and rewrites the `auto_now` fields (an empty
+            # `update_fields` skips the write, and changes nothing).
+            dirty += [
+                name
+                for name in self._auto_now_fields()
+                if name not in dirty
+                and (update_fields is None or name in update_fields)
+            ]
+
+        super().save(*args, **kwargs)
+
+        self._store_loaded_state(update_fields)
+        changes_saved.send(
+            sender=type(self),
+            instance=self,
+            created=created,
+            changed_fields=None if dirty is None else frozenset(dirty),
+        )
@@ -5,6 +5,16 @@ from .viewsets import (
     RetrieveOnlyViewSet,
     ReadOnlyListRetrieveViewSet,
 )
+from .bundles import BundleView
+from .mixins import (
+    BatchRetrieveMixin,
+    BulkModelMixin,
+    CachedResponseMixin,
+    ChangesFeedMixin,
+    ExportMixin,
+    FacetMixin,
+    SlugLookupMixin,
+)
 
 __all__ = [
     "BaseParsedViewSet",
@@ -12,4 +22,12 @@ __all__ = [
     "CreateOnlyViewSet",
     "RetrieveOnlyViewSet",
     "ReadOnlyListRetrieveViewSet",
+    "BundleView",
+    "BatchRetrieveMixin",
+    "BulkModelMixin",
+    "CachedResponseMixin",
+    "ChangesFeedMixin",
+    "ExportMixin",
+    "FacetMixin",
+    "SlugLookupMixin",
 ]
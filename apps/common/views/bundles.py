@@ -0,0 +1,116 @@
+"""
+============================================================
+Precomputed Data Bundles - H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides `BundleView`, which serves several small reference tables
+in one JSON payload (e.g. the lookups a client needs at startup).
+
+How it works:
+    - The payload is serialized and gzip-compressed once per combination of
+      the tables' cache generations (`apps.common.cache`), and stored in the
+      shared cache; requests only copy the stored bytes
+    - Rows are read from the in-process lookup tables (`apps.common.lookups`),
+      so building the payload usually runs no query either
+    - The `ETag` is derived from the generations alone: it stays the same
+      until one of the tables is written, and `If-None-Match` revalidations
+      are answered with `304 Not Modified` without touching the payload
+    - Clients that do not accept gzip get the decompressed JSON
+
+Usage Example:
+--------------
+    class ReferenceBootstrapView(BundleView):
+        bundle_sections = {
+            "types": (FacilityType, FacilityTypeSerializer),
+        }
+
+License: GPLv2
+"""
+
+import gzip
+
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.views import APIView
+
+# Local cache, lookup and JSON utilities
+from apps.common.cache import get_cache, get_generations, make_cache_key
+from apps.common.lookups import get_lookup_table
+from apps.common.renderers import dumps
+
+
+class BundleView(APIView):
+    """
+    GET-only view returning `{section: [row, ...], ...}` for the models of
+    `bundle_sections` (`{section: (model, serializer_class)}`), from a
+    precomputed, gzip-compressed blob.
+    """
+
+    bundle_sections = {}
+    bundle_timeout = 60 * 60 * 24
+    bundle_max_age = 60 * 60
+
+    def get_bundle_models(self):
+        return [model for model, _serializer in self.bundle_sections.values()]
+
+    def get_etag(self, generations):
+        path = f"{self.__class__.__module__}.{self.__class__.__qualname__}"
+        digest = make_cache_key("bundle-etag", path, generations)
+        return quote_etag(digest.rsplit(":", 1)[-1])
+
+    def get(self, request, *args, **kwargs):
+        generations = get_generations(*self.get_bundle_models())
+        etag = self.get_etag(generations)
+
+        etags = {
+            tag.removeprefix("W/")
+            for tag in parse_etags(request.headers.get("If-None-Match", ""))
+        }
+        if "*" in etags or etag in etags:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            blob = self.get_blob(etag)
+            accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+            response = HttpResponse(
+                blob if accepts_gzip else gzip.decompress(blob),
+                content_type="application/json",
+            )
+            if accepts_gzip:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        patch_cache_control(response, max_age=self.bundle_max_age)
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def get_blob(self, etag):
+        """
+        Return the compressed payload of the version `etag`, building it once.
+        """
+        cache = get_cache()
+        key = make_cache_key("bundle", etag)
+        blob = cache.get(key)
+        if blob is None:
+            blob = gzip.compress(dumps(self.build_payload()), mtime=0)
+            cache.set(key, blob, timeout=self.bundle_timeout)
+        return blob
+
+    def build_payload(self):
+        payload = {}
+        for section, (model, serializer_class) in self.bundle_sections.items():
+            # Forced: a table read less than `check_interval` ago may still
+            # predate the generations this payload is stored under.
+            snapshot = get_lookup_table(model).get_snapshot(force=True)
+            rows = [snapshot.rows[pk] for pk in sorted(snapshot.rows)]
+            payload[section] = serializer_class(rows, many=True).data
+        return payload
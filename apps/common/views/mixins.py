@@ -0,0 +1,903 @@
+"""
+============================================================
+Common ViewSet Mixins - H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file provides optional mixins for the base ViewSets in
+`apps.common.views.viewsets`.
+
+These include:
+    - CachedResponseMixin: Server-side cache for `list` and `retrieve`
+      responses, invalidated through per-model cache generations
+    - BulkModelMixin: `bulk/` endpoint creating (POST), updating (PATCH) and
+      deleting (DELETE) many objects per request, with per-item results
+    - BatchRetrieveMixin: `batch/` endpoint retrieving many objects by id or
+      slug with one query
+    - ExportMixin: `export/` endpoint streaming the filtered queryset as CSV
+      or NDJSON in constant memory
+    - SlugLookupMixin: `by-slug/<slug>/` detail route served like `retrieve`,
+      through a cached slug → id mapping
+    - FacetMixin: `facets/` endpoint with grouped counts for several
+      dimensions of the filtered queryset in one round trip
+    - ChangesFeedMixin: `changes/` delta sync feed of created/updated rows and
+      deletion tombstones since an opaque cursor
+
+Mixins must be listed before the base ViewSet so that they wrap its actions:
+
+    class FacilityViewSet(CachedResponseMixin, BaseCRUDViewSet):
+        cache_dependencies = [Facility, FacilityType]
+
+License: GPLv2
+"""
+
+import base64
+import binascii
+import csv
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotAuthenticated,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Local cache utilities
+from apps.common.cache import (
+    get_cache,
+    get_generation,
+    get_generations,
+    make_cache_key,
+)
+
+# Local JSON encoding and parsing
+from apps.common.parsers import FastJSONParser
+from apps.common.renderers import (
+    CSVPassthroughRenderer,
+    NDJSONPassthroughRenderer,
+    dumps,
+)
+
+
+class CachedResponseMixin:
+    """
+    Cache the data of successful `list` and `retrieve` responses.
+
+    Cache keys combine:
+    - the host, path and normalized (sorted) query parameters
+    - the active language
+    - the current generation of every model in `cache_dependencies`
+      (defaults to the queryset's model)
+    - the user's id, when `cache_vary_on_user` is set
+
+    Writes bump the generations from `post_save` / `post_delete` receivers,
+    so stale entries are never read again and simply expire; no key scans or
+    deletes are needed. Works with any Django cache backend, but several
+    worker processes must share one (file-based, Redis, Memcached...).
+    """
+
+    cache_actions = ("list", "retrieve")
+    cache_dependencies = None
+    cache_vary_on_user = False
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """
+        Return the cached response for this request, or run `handler`.
+        """
+        if self.action not in self.cache_actions:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=self.get_cache_timeout())
+        return response
+
+    def get_cache_dependencies(self):
+        if self.cache_dependencies is not None:
+            return list(self.cache_dependencies)
+        return [self.queryset.model]
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        user = request.user.pk if self.cache_vary_on_user else None
+        return make_cache_key(
+            "response",
+            f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+            self.action,
+            request.get_host(),
+            request.path,
+            params,
+            translation.get_language(),
+            user,
+            get_generations(*self.get_cache_dependencies()),
+        )
+
+
+class BatchRetrieveMixin:
+    """
+    Retrieve many objects in one request through a `batch/` route.
+
+    GET batch/?ids=3,1,2 (or ?slugs=a,b) loads the objects with a single
+    `IN` query, built like `retrieve` (same filters, related-object plan,
+    sparse fields and object permissions), and returns them in the requested
+    order along with the requested values that matched nothing:
+
+        {"results": [{...}, {...}], "missing": [2]}
+
+    At most `batch_max_size` values are accepted per request.
+    """
+
+    batch_max_size = 100
+    batch_slug_field = "slug"
+
+    @action(detail=False, methods=["get"], url_path="batch", pagination_class=None)
+    def batch_retrieve(self, request, *args, **kwargs):
+        params = request.query_params
+        if "ids" in params:
+            field = "pk"
+            pk_field = self.get_queryset().model._meta.pk
+            try:
+                values = [
+                    pk_field.to_python(value)
+                    for value in params["ids"].split(",")
+                    if value.strip()
+                ]
+            except DjangoValidationError:
+                raise ValidationError({"ids": [_("Enter a list of valid ids.")]})
+        elif "slugs" in params and self.batch_slug_field:
+            field = self.batch_slug_field
+            values = [value.strip() for value in params["slugs"].split(",")]
+            values = [value for value in values if value]
+        else:
+            raise ValidationError({"ids": [_("Pass `ids` or `slugs`.")]})
+
+        values = list(dict.fromkeys(values))
+        if len(values) > self.batch_max_size:
+            raise ValidationError(
+                {
+                    "ids" if field == "pk" else "slugs": [
+                        _("At most %(limit)d values are allowed per request.")
+                        % {"limit": self.batch_max_size}
+                    ]
+                }
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        found = {}
+        for obj in queryset.filter(**{f"{field}__in": values}).order_by():
+            self.check_object_permissions(request, obj)
+            found[getattr(obj, field)] = obj
+
+        serializer = self.get_serializer(
+            [found[value] for value in values if value in found], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [value for value in values if value not in found],
+            }
+        )
+
+
+class BulkModelMixin:
+    """
+    Bulk create, update and delete through a single `bulk/` route.
+
+    Request bodies are JSON arrays:
+        - POST   bulk/  `[{...}, {...}]`                  create
+        - PATCH  bulk/  `[{"id": 1, ...}, {"id": 2, ...}]` partial update
+        - DELETE bulk/  `[1, 2]` or `[{"id": 1}, ...]`     delete
+
+    Items are validated one by one with the viewset's serializer
+    (`many=True`); valid items are written with `bulk_create` /
+    `bulk_update` in batches of `bulk_batch_size`, inside one transaction.
+    The response lists one result per item, in request order:
+
+        {"index": 0, "status": 201, "data": {...}}
+        {"index": 1, "status": 400, "errors": {...}}
+
+    By default invalid items are reported and the valid ones are still
+    written (207 Multi-Status when some failed). With `?atomic=true` any
+    error rejects the whole request with 400 and nothing is written.
+
+    Updated and deleted rows go through `check_object_permissions()`, as on
+    the single-object endpoints; a denied row is reported with its 401/403.
+    """
+
+    bulk_batch_size = 500
+    bulk_max_items = 1000
+    bulk_atomic_query_param = "atomic"
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[FastJSONParser],
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        serializer = self.get_serializer(data=items, many=True)
+        validated = serializer.validate_items()
+
+        results = self._error_results(validated)
+        if results and self.is_atomic_bulk_request(request):
+            return self.get_bulk_response(results, len(items), atomic=True)
+
+        valid = [
+            (index, data)
+            for index, (data, errors) in enumerate(validated)
+            if errors is None
+        ]
+        instances = serializer.bulk_create(
+            [data for index, data in valid], batch_size=self.bulk_batch_size
+        )
+        for (index, data), instance in zip(valid, instances):
+            results.append(
+                {
+                    "index": index,
+                    "status": status.HTTP_201_CREATED,
+                    "data": serializer.child.to_representation(instance),
+                }
+            )
+        return self.get_bulk_response(
+            results, len(items), success=status.HTTP_201_CREATED
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        pks, results = self._parse_bulk_pks(items)
+        found = self.get_queryset().in_bulk([pk for pk in pks if pk is not None])
+
+        positions, instances, data = [], [], []
+        for index, (item, pk) in enumerate(zip(items, pks)):
+            if pk is None:
+                continue
+            if pk not in found:
+                results.append(self._not_found_result(index))
+                continue
+            denied = self._permission_result(request, index, found[pk])
+            if denied is not None:
+                results.append(denied)
+                continue
+            positions.append(index)
+            instances.append(found[pk])
+            data.append(item)
+
+        serializer = self.get_serializer(instances, data=data, many=True, partial=True)
+        validated = serializer.validate_items()
+        for position, (data, errors) in zip(positions, validated):
+            if errors is not None:
+                results.append(self._error_result(position, errors))
+        if results and self.is_atomic_bulk_request(request):
+            return self.get_bulk_response(results, len(items), atomic=True)
+
+        valid = [
+            (position, instance, item_data)
+            for position, instance, (item_data, errors) in zip(
+                positions, instances, validated
+            )
+            if errors is None
+        ]
+        serializer.bulk_update(
+            [instance for position, instance, item_data in valid],
+            [item_data for position, instance, item_data in valid],
+            batch_size=self.bulk_batch_size,
+        )
+        for position, instance, item_data in valid:
+            results.append(
+                {
+                    "index": position,
+                    "status": status.HTTP_200_OK,
+                    "data": serializer.child.to_representation(instance),
+                }
+            )
+        return self.get_bulk_response(results, len(items))
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        pks, results = self._parse_bulk_pks(items)
+        queryset = self.get_queryset().order_by()
+        # Loaded, not only counted: object permissions may read any field.
+        found = queryset.in_bulk([pk for pk in pks if pk is not None])
+
+        deleted = []
+        for index, pk in enumerate(pks):
+            if pk is None:
+                continue
+            if pk not in found:
+                results.append(self._not_found_result(index))
+                continue
+            denied = self._permission_result(request, index, found[pk])
+            if denied is not None:
+                results.append(denied)
+                continue
+            deleted.append(pk)
+            results.append({"index": index, "status": status.HTTP_204_NO_CONTENT})
+        if len(deleted) < len(items) and self.is_atomic_bulk_request(request):
+            return self.get_bulk_response(
+                [result for result in results if result["status"] >= 400],
+                len(items),
+                atomic=True,
+            )
+
+        with transaction.atomic():
+            queryset.filter(pk__in=deleted).delete()
+        return self.get_bulk_response(results, len(items))
+
+    def get_bulk_items(self, request):
+        """
+        Return the request's item list, enforcing `bulk_max_items`.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {"non_field_errors": [_("Expected a list of items.")]}
+            )
+        if not items:
+            raise ValidationError(
+                {"non_field_errors": [_("The list of items must not be empty.")]}
+            )
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        _("At most %(limit)d items are allowed per request.")
+                        % {"limit": self.bulk_max_items}
+                    ]
+                }
+            )
+        return items
+
+    def is_atomic_bulk_request(self, request):
+        value = request.query_params.get(self.bulk_atomic_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def get_bulk_response(
+        self, results, total, success=status.HTTP_200_OK, atomic=False
+    ):
+        """
+        Build the response envelope of a bulk request.
+        """
+        results = sorted(results, key=lambda result: result["index"])
+        failed = sum(1 for result in results if result["status"] >= 400)
+        if atomic:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed == total:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success
+        return Response(
+            {
+                "succeeded": 0 if atomic else total - failed,
+                "failed": failed,
+                "results": results,
+            },
+            status=response_status,
+        )
+
+    def _parse_bulk_pks(self, items):
+        """
+        Return the primary key of every item (None when invalid) and the
+        error results of the invalid ones.
+        """
+        pk_field = self.get_queryset().model._meta.pk
+        pks, results = [], []
+        for index, item in enumerate(items):
+            value = item.get("id") if isinstance(item, dict) else item
+            try:
+                if value is None or isinstance(value, (dict, list)):
+                    raise DjangoValidationError("")
+                pks.append(pk_field.to_python(value))
+            except DjangoValidationError:
+                pks.append(None)
+                results.append(
+                    self._error_result(index, {"id": [_("A valid id is required.")]})
+                )
+        return pks, results
+
+    def _permission_result(self, request, index, obj):
+        """
+        Return the error result of an item whose row the request may not
+        change, or None.
+        """
+        try:
+            self.check_object_permissions(request, obj)
+        except (NotAuthenticated, PermissionDenied) as exc:
+            return {
+                "index": index,
+                "status": exc.status_code,
+                "errors": {"detail": exc.detail},
+            }
+        return None
+
+    def _error_results(self, validated):
+        return [
+            self._error_result(index, errors)
+            for index, (data, errors) in enumerate(validated)
+            if errors is not None
+        ]
+
+    def _error_result(self, index, errors):
+        return {
+            "index": index,
+            "status": status.HTTP_400_BAD_REQUEST,
+            "errors": errors,
+        }
+
+    def _not_found_result(self, index):
+        return {
+            "index": index,
+            "status": status.HTTP_404_NOT_FOUND,
+            "errors": {"id": [_("Not found.")]},
+        }
+
+
+class _EchoBuffer:
+    """
+    File-like object whose `write()` returns the written value, so that
+    `csv.writer` can produce lines for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Stream the whole filtered queryset through an `export/` route.
+
+    GET export/?export_format=csv|ndjson applies the viewset's filter, search
+    and ordering backends (but no pagination) and renders each row with the
+    viewset's serializer. Rows are read with `iterator(chunk_size=...)`, a
+    server-side cursor on PostgreSQL, and written to a
+    `StreamingHttpResponse`, so memory stays flat for any table size.
+
+    The format can also be negotiated with `Accept: text/csv` /
+    `Accept: application/x-ndjson` (or DRF's `?format=csv|ndjson`); an
+    explicit `export_format` wins, and CSV is the default.
+
+    Columns default to `export_fields`, then `list_fields`; `?fields=` and
+    `?exclude=` narrow them as on reads. (`format` is reserved by DRF for
+    renderer selection, hence `export_format`.)
+    """
+
+    export_formats = ("csv", "ndjson")
+    export_format_query_param = "export_format"
+    export_chunk_size = 2000
+    export_fields = None
+
+    @action(
+        detail=False,
+        methods=["get"],
+        pagination_class=None,
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            CSVPassthroughRenderer,
+            NDJSONPassthroughRenderer,
+        ],
+    )
+    def export(self, request, *args, **kwargs):
+        negotiated = getattr(request.accepted_renderer, "format", None)
+        export_format = request.query_params.get(
+            self.export_format_query_param,
+            negotiated if negotiated in self.export_formats else self.export_formats[0],
+        )
+        if export_format not in self.export_formats:
+            raise ValidationError(
+                {
+                    self.export_format_query_param: [
+                        _("Unsupported export format. Choose one of: %(formats)s.")
+                        % {"formats": ", ".join(self.export_formats)}
+                    ]
+                }
+            )
+
+        serializer = self.get_serializer()
+        rows = self.filter_queryset(self.get_queryset()).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        render = getattr(self, f"render_{export_format}")
+        content_type = {
+            "csv": "text/csv; charset=utf-8",
+            "ndjson": "application/x-ndjson; charset=utf-8",
+        }[export_format]
+
+        response = StreamingHttpResponse(
+            render(serializer, rows), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.get_export_filename()}.{export_format}"'
+        )
+        return response
+
+    def get_field_selection(self):
+        fields, exclude = super().get_field_selection()
+        if self.action == "export" and (
+            self.fields_query_param not in self.request.query_params
+        ):
+            fields = self.export_fields or self.list_fields
+        return fields, exclude
+
+    def get_export_filename(self):
+        return self.get_queryset().model._meta.model_name
+
+    def render_csv(self, serializer, rows):
+        writer = csv.writer(_EchoBuffer())
+        names = list(serializer.fields)
+        yield writer.writerow(names)
+        for row in rows:
+            data = serializer.to_representation(row)
+            yield writer.writerow([self._csv_value(data[name]) for name in names])
+
+    def render_ndjson(self, serializer, rows):
+        for row in rows:
+            yield dumps(serializer.to_representation(row)) + b"\n"
+
+    def _csv_value(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            # Expanded relations are embedded as JSON.
+            return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+        return value
+
+
+class SlugLookupMixin:
+    """
+    Retrieve objects by slug through `by-slug/<slug>/`.
+
+    The slug is mapped to the primary key through a small cache entry keyed on
+    the model's cache generation (so any save or delete invalidates it), then
+    the request is handled exactly like `retrieve`: same permissions, query
+    budget, conditional request headers and response cache.
+
+    Lookups of unknown slugs are cached too, and answer 404.
+    """
+
+    slug_lookup_field = "slug"
+    slug_cache_timeout = 3600
+
+    @action(detail=False, methods=["get"], url_path=r"by-slug/(?P<slug>[-\w]+)")
+    def by_slug(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        if self.action == "by_slug":
+            # From here on the request is a plain `retrieve` by primary key; a
+            # missing slug maps to None and 404s in `get_object()`.
+            self.action = "retrieve"
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            self.kwargs[lookup_url_kwarg] = self.resolve_slug(self.kwargs["slug"])
+        super().initial(request, *args, **kwargs)
+
+    def resolve_slug(self, slug):
+        """
+        Return the primary key of the object with `slug`, or None.
+        """
+        model = self.queryset.model
+        cache = get_cache()
+        key = make_cache_key(
+            "slug", model._meta.label_lower, slug, get_generation(model)
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+
+        pk = (
+            self.queryset.filter(**{self.slug_lookup_field: slug})
+            .order_by()
+            .values_list("pk", flat=True)
+            .first()
+        )
+        # Wrapped so that a cached miss (None) is told apart from no entry.
+        cache.set(key, (pk,), timeout=self.slug_cache_timeout)
+        return pk
+
+
+class FacetMixin:
+    """
+    Grouped counts of the filtered queryset through a `facets/` route.
+
+    `facet_fields` maps each facet to the field paths it reports; the first
+    path is the grouping key (`value`), the others are extra columns that
+    depend on it, reported under their last path component:
+
+        facet_fields = {
+            "province": ["province"],
+            "type": ["type", "type__slug", "type__title"],
+        }
+
+    GET facets/?province=Tehran&facets=type&facet_limit=10 returns
+
+        {"type": [{"value": 1, "slug": "hospital", "title": ..., "count": 42}]}
+
+    The viewset's filter and search backends apply. On PostgreSQL all facets
+    come from one `GROUP BY GROUPING SETS` query, elsewhere from one
+    `GROUP BY` per facet. Results are cached under the cache generations of
+    the viewset's models, so any write invalidates them.
+    """
+
+    facet_fields = {}
+    facet_limit = 50
+    facet_max_limit = 500
+    facets_query_param = "facets"
+    facet_limit_query_param = "facet_limit"
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def facets(self, request, *args, **kwargs):
+        names = request.query_params.get(self.facets_query_param)
+        facets = {
+            name: paths
+            for name, paths in self.facet_fields.items()
+            if names is None or name in names.split(",")
+        }
+        try:
+            limit = int(
+                request.query_params.get(self.facet_limit_query_param, self.facet_limit)
+            )
+        except ValueError:
+            limit = self.facet_limit
+        limit = max(1, min(limit, self.facet_max_limit))
+
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        cache = get_cache()
+        key = make_cache_key(
+            "facets",
+            f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+            sorted(request.query_params.lists()),
+            get_generations(
+                *(getattr(self, "cache_dependencies", None) or [model])
+            ),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = self.get_facet_counts(queryset, facets, limit)
+            timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+            cache.set(key, data, timeout=timeout)
+        return Response(data)
+
+    def get_facet_counts(self, queryset, facets, limit):
+        """
+        Return `{facet: [row, ...]}` with the `limit` largest groups per facet.
+        """
+        if not facets:
+            return {}
+        queryset = queryset.order_by()
+        if connections[queryset.db].vendor == "postgresql":
+            rows = self._grouping_sets_counts(queryset, facets)
+        else:
+            rows = {
+                name: [
+                    (*(row[path] for path in paths), row["count"])
+                    for row in queryset.values(*paths).annotate(count=Count("pk"))
+                ]
+                for name, paths in facets.items()
+            }
+
+        data = {}
+        for name, paths in facets.items():
+            keys = ["value", *(path.split("__")[-1] for path in paths[1:])]
+            groups = sorted(
+                rows.get(name, []),
+                key=lambda row: (-row[-1], row[0] is None, str(row[0])),
+            )
+            data[name] = [
+                {**dict(zip(keys, row[:-1])), "count": row[-1]}
+                for row in groups[:limit]
+            ]
+        return data
+
+    def _grouping_sets_counts(self, queryset, facets):
+        """
+        Count every facet with one `GROUPING SETS` query (PostgreSQL).
+        """
+        aliases, sets = {}, []
+        for name, paths in facets.items():
+            names = []
+            for path in paths:
+                aliases.setdefault(path, f"f{len(aliases)}")
+                names.append(aliases[path])
+            sets.append(names)
+
+        inner = queryset.values(**{alias: F(path) for path, alias in aliases.items()})
+        sql, params = inner.query.sql_with_params()
+        columns = ", ".join(aliases.values())
+        grouping = ", ".join(names[0] for names in sets)
+        grouping_sets = ", ".join(f"({', '.join(names)})" for names in sets)
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT {columns}, GROUPING({grouping}), COUNT(*) "
+                f"FROM ({sql}) AS facet_rows GROUP BY GROUPING SETS ({grouping_sets})",
+                params,
+            )
+            result = cursor.fetchall()
+
+        # GROUPING() has one bit per facet (first facet = highest bit), 0 for
+        # the facet the row is grouped by.
+        positions = {alias: index for index, alias in enumerate(aliases.values())}
+        rows = {name: [] for name in facets}
+        for row in result:
+            mask, count = row[-2], row[-1]
+            for index, (name, names) in enumerate(zip(facets, sets)):
+                if not mask & (1 << (len(sets) - 1 - index)):
+                    rows[name].append(
+                        (*(row[positions[alias]] for alias in names), count)
+                    )
+                    break
+        return rows
+
+
+class ChangesFeedMixin:
+    """
+    Incremental sync through a `changes/` route.
+
+    GET changes/?cursor=<opaque>&limit=<int> returns
+
+        {
+            "results": [...],    # rows created or updated since the cursor
+            "deleted": [{"id": 7, "slug": "...", "deleted_at": "..."}],
+            "cursor": "...",     # pass back on the next call
+            "has_more": true,    # call again right away
+        }
+
+    Rows are read in `(changes_field, id)` order and tombstones (deleted rows,
+    recorded in `changes_tombstone_model` with `object_id`, `slug` and
+    `deleted_at`) in `(deleted_at, id)` order; the cursor holds the position
+    in both, so each call is an index range scan and the cost follows the
+    number of changes, not the table size. Without a cursor the feed starts
+    with every row and only the deletions from then on.
+
+    Rows written in the last `changes_settle_time` are held back until the
+    next call, so that transactions committing slightly out of timestamp
+    order are not skipped. Filters do not apply: a client must see every
+    change of the rows it holds.
+    """
+
+    changes_field = "updated_at"
+    changes_tombstone_model = None
+    changes_limit = 500
+    changes_max_limit = 5000
+    changes_settle_time = timedelta(seconds=2)
+
+    @action(detail=False, methods=["get"], pagination_class=None, filter_backends=[])
+    def changes(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", self.changes_limit))
+        except ValueError:
+            limit = self.changes_limit
+        limit = max(1, min(limit, self.changes_max_limit))
+
+        until = timezone.now() - self.changes_settle_time
+        position = self.decode_changes_cursor(request.query_params.get("cursor"))
+
+        # Changed rows
+        field = self.changes_field
+        queryset = self.get_queryset().filter(**{f"{field}__lte": until})
+        if position["u"] is not None:
+            changed_at = datetime.fromisoformat(position["u"])
+            queryset = queryset.filter(
+                Q(**{f"{field}__gt": changed_at})
+                | Q(**{field: changed_at, "pk__gt": position["i"]})
+            )
+        rows = list(queryset.order_by(field, "pk")[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            position["u"] = getattr(rows[-1], field).isoformat()
+            position["i"] = rows[-1].pk
+
+        # Deletions
+        deleted = []
+        tombstones = self.changes_tombstone_model._default_manager.filter(
+            deleted_at__lte=until
+        ).order_by("deleted_at", "pk")
+        if position["d"] is None:
+            # A first sync downloads live rows only; deletions from now on.
+            last = tombstones.values_list("deleted_at", "pk").last()
+            if last is not None:
+                position["d"], position["t"] = last[0].isoformat(), last[1]
+            else:
+                position["d"], position["t"] = until.isoformat(), 0
+        else:
+            deleted_at = datetime.fromisoformat(position["d"])
+            tombstones = list(
+                tombstones.filter(
+                    Q(deleted_at__gt=deleted_at)
+                    | Q(deleted_at=deleted_at, pk__gt=position["t"])
+                )[: limit + 1]
+            )
+            has_more = has_more or len(tombstones) > limit
+            tombstones = tombstones[:limit]
+            if tombstones:
+                position["d"] = tombstones[-1].deleted_at.isoformat()
+                position["t"] = tombstones[-1].pk
+            deleted = [
+                {
+                    "id": tombstone.object_id,
+                    "slug": tombstone.slug,
+                    "deleted_at": tombstone.deleted_at,
+                }
+                for tombstone in tombstones
+            ]
+
+        serializer = self.get_serializer(rows, many=True)
+        return Response(
+            {
+                "results": serializer.data,
+                "deleted": deleted,
+                "cursor": self.encode_changes_cursor(position),
+                "has_more": has_more,
+            }
+        )
+
+    def encode_changes_cursor(self, position):
+        data = json.dumps(position, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    def decode_changes_cursor(self, cursor):
+        """
+        Return the `{"u", "i", "d", "t"}` feed position of `cursor`.
+        """
+        if not cursor:
+            return {"u": None, "i": None, "d": None, "t": None}
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            position = json.loads(data)
+            position = {key: position[key] for key in ("u", "i", "d", "t")}
+            # Each timestamp comes with the id breaking its ties, or neither.
+            for stamp, key in (("u", "i"), ("d", "t")):
+                if position[stamp] is None and position[key] is None:
+                    continue
+                datetime.fromisoformat(position[stamp])
+                if type(position[key]) is not int:
+                    raise TypeError(key)
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise ValidationError({"cursor": [_("Invalid cursor.")]})
+        return position
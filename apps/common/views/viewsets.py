@@ -14,7 +14,8 @@ Description:
 This file provides shared base ViewSet classes for Django REST Framework.
 
 These include:
-    - BaseParsedViewSet: Adds multipart/form-data parsing, pagination, filtering, and search
+    - BaseParsedViewSet: Adds JSON and streamed multipart/form-data parsing,
+      pagination (page-number or keyset), filtering, and search
     - BaseCRUDViewSet: Full Create/Read/Update/Delete functionality
     - ReadOnlyListRetrieveViewSet: Read-only ViewSet with list and detail support
     - CreateOnlyViewSet: Allows only object creation (POST)
@@ -26,13 +27,59 @@ reduce boilerplate, and support scalable API development.
 License: GPLv2
 """
 
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max
+from django.db.models.constants import LOOKUP_SEP
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework import viewsets, mixins
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.parsers import FormParser
+from rest_framework import viewsets, mixins, status
+from rest_framework.response import Response
+
+# Local exceptions and cache utilities
+from apps.common.cache import get_cache, get_generations, make_cache_key
+from apps.common.exceptions import NotModified, PreconditionFailed
+
+# Local lookup tables
+from apps.common.lookups import get_lookup_table
+
+# Local parsers
+from apps.common.parsers import FastJSONParser, StreamingMultiPartParser
 
 # Local pagination
-from apps.common.pagination import StandardResultsSetPagination
+from apps.common.pagination import (
+    KeysetResultsSetPagination,
+    StandardResultsSetPagination,
+)
+
+# Local search and query planning
+from apps.common.query import plan_lookups, plan_serializer
+from apps.common.search import IndexedSearchFilter, SearchDocumentMixin
+
+# Local serializers
+from apps.common.serializers import BaseModelSerializer
+
+# Local view mixins
+from apps.common.views.mixins import BatchRetrieveMixin, BulkModelMixin
+
+
+def _split_param(value):
+    """
+    Split a comma separated query parameter, or return None if absent.
+    """
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 
 class BaseParsedViewSet(viewsets.GenericViewSet):
@@ -40,21 +87,380 @@ class BaseParsedViewSet(viewsets.GenericViewSet):
     Abstract base ViewSet with common API features.
 
     Features:
-    - Parses multipart/form-data (e.g., file uploads)
+    - Parses JSON bodies (`FastJSONParser`) for writes without files, and
+      multipart/form-data uploads streamed to bounded temporary files
+      (`StreamingMultiPartParser`, limited by `upload_max_size` and
+      `upload_content_types`)
     - Supports pagination using `StandardResultsSetPagination`
+    - Keyset pagination (`KeysetResultsSetPagination`) can be opted into per
+      viewset by setting `pagination_class`, or per request with
+      `?pagination=cursor` (any request carrying a `?cursor=` also uses it)
     - Enables filtering, searching, and ordering via query parameters
+    - Searching uses `IndexedSearchFilter`: ranked, indexed full-text search for
+      models with a search document, plain `search_fields` otherwise
+    - Sparse fieldsets on reads: `?fields=a,b` / `?exclude=c` trim the
+      `BaseModelSerializer` output and `defer()` the columns no longer needed;
+      `list` defaults to the viewset's `list_fields` summary (`?fields=*`
+      returns every field)
+    - `?expand=a,b` inlines related objects declared in the serializer's
+      `Meta.expandable_fields`, joined into the same query
+    - Automatic `select_related` / `prefetch_related` planning from the
+      serializer's (possibly nested or trimmed) fields and the active
+      `__` ordering and search fields
+    - Optional query budget per action (`expected_query_counts`), asserted
+      when the `QUERY_COUNT_ASSERTIONS` setting is on; (re)loads of the
+      serializer's cached lookup tables are not counted
+    - Conditional requests backed by `conditional_field` (`updated_at`):
+        • list: ETag from `MAX(updated_at)` + row count of the filtered queryset
+        • detail: ETag / Last-Modified from the row's `updated_at`, the
+          ETag also covering the query parameters, the language and the
+          generations of the related lookups (not of the model itself)
+        • `If-None-Match` / `If-Modified-Since` answer 304 before serializing
+        • `If-Match` / `If-Unmodified-Since` on PUT/PATCH/DELETE answer 412
+          when the row changed (optimistic concurrency)
 
     Typical usage:
     - Extend this class with appropriate mixins (e.g., ListModelMixin)
     - Used as the base for all other custom ViewSets in the system
     """
 
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [FastJSONParser, StreamingMultiPartParser, FormParser]
+    upload_max_size = None
+    upload_content_types = None
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    keyset_pagination_class = KeysetResultsSetPagination
+    pagination_mode_query_param = "pagination"
+    filter_backends = [DjangoFilterBackend, OrderingFilter, IndexedSearchFilter]
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+    expand_query_param = "expand"
+    list_fields = None
+    expected_query_counts = {}
+    conditional_field = "updated_at"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer()
+
+        if isinstance(serializer, BaseModelSerializer):
+            deferred = serializer.get_deferrable_fields(
+                keep=self.get_keyset_fields(queryset)
+            )
+            if deferred:
+                queryset = queryset.defer(*deferred)
+
+        plan = plan_serializer(serializer, queryset.model)
+        plan_lookups(queryset.model, self.get_active_lookups(queryset), plan)
+        return plan.apply(queryset)
+
+    def get_keyset_fields(self, queryset):
+        """
+        Return the local fields a keyset paginator reads from the rows of the
+        page to build its cursors (the ordering columns), so that they are
+        loaded even when the sparse fieldset leaves them out.
+        """
+        request = getattr(self, "request", None)
+        if request is None or not isinstance(
+            self.paginator, KeysetResultsSetPagination
+        ):
+            return []
+        ordering = None
+        if OrderingFilter in self.filter_backends:
+            ordering = OrderingFilter().get_ordering(request, queryset, self)
+        ordering = ordering or queryset.model._meta.ordering
+        return [term.lstrip("-").split(LOOKUP_SEP)[0] for term in ordering]
+
+    def get_active_lookups(self, queryset):
+        """
+        Return the `__` lookups of this request's ordering and search fields.
+        """
+        request = getattr(self, "request", None)
+        if request is None:
+            return []
+
+        lookups = []
+        ordering = request.query_params.get(OrderingFilter.ordering_param)
+        if ordering:
+            terms = OrderingFilter().remove_invalid_fields(
+                queryset, _split_param(ordering), self, request
+            )
+            lookups += [term.lstrip("-") for term in terms]
+        if request.query_params.get(IndexedSearchFilter.search_param) and not (
+            issubclass(queryset.model, SearchDocumentMixin)
+        ):
+            # Indexed search reads one local column; plain search joins.
+            lookups += [
+                field.lstrip("^=@$") for field in getattr(self, "search_fields", [])
+            ]
+        return [lookup for lookup in lookups if LOOKUP_SEP in lookup]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, BaseModelSerializer):
+            fields, exclude = self.get_field_selection()
+            kwargs.setdefault("fields", fields)
+            kwargs.setdefault("exclude", exclude)
+            kwargs.setdefault("expand", self.get_expansion())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_field_selection(self):
+        """
+        Return the `(fields, exclude)` sparse fieldset for this request.
+
+        Only reads are trimmed; writes always validate and echo every field.
+        """
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+
+        params = request.query_params
+        fields = _split_param(params.get(self.fields_query_param))
+        if fields is None and self.action == "list":
+            fields = self.list_fields
+        elif fields == ["*"]:
+            fields = None
+        exclude = _split_param(params.get(self.exclude_query_param))
+        return fields, exclude
+
+    def get_expansion(self):
+        """
+        Return the related fields to expand for this read, or None.
+        """
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        return _split_param(request.query_params.get(self.expand_query_param))
+
+    @property
+    def paginator(self):
+        """
+        The paginator instance for this request, honoring `?pagination=cursor`.
+        """
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.get_pagination_class()
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
+
+    def get_pagination_class(self):
+        """
+        Return the keyset pagination class when the request asks for it.
+        """
+        request = getattr(self, "request", None)
+        if self.pagination_class is None or request is None:
+            return self.pagination_class
+
+        params = request.query_params
+        keyset = self.keyset_pagination_class
+        if keyset is not None and (
+            params.get(self.pagination_mode_query_param) == "cursor"
+            or keyset.cursor_query_param in params
+        ):
+            return keyset
+        return self.pagination_class
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.check_conditional_request(request)
+
+        # Count only the queries of the action itself, after authentication.
+        self._query_capture = None
+        if getattr(settings, "QUERY_COUNT_ASSERTIONS", False):
+            self.load_lookup_tables()
+            self._query_capture = CaptureQueriesContext(connections["default"])
+            self._query_capture.__enter__()
+
+    def load_lookup_tables(self):
+        """
+        Load the lookup tables of the serializer's `Meta.cached_lookup_fields`
+        (`apps.common.lookups`), if cold or outdated. Their one-off reloads
+        after a cache flush or a generation bump are not part of any budget.
+        """
+        meta = getattr(self.get_serializer_class(), "Meta", None)
+        model = getattr(meta, "model", None)
+        for name in getattr(meta, "cached_lookup_fields", ()):
+            related_model = model._meta.get_field(name).related_model
+            get_lookup_table(related_model).get_snapshot(force=True)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code, headers=exc.headers)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_validators", None)
+        if validators and response.status_code == status.HTTP_200_OK:
+            for header, value in validators.items():
+                response.setdefault(header, value)
+
+        capture = getattr(self, "_query_capture", None)
+        if capture is not None:
+            self._query_capture = None
+            capture.__exit__(None, None, None)
+            self.check_query_count(capture.captured_queries)
+        return response
+
+    def get_conditional_dependencies(self, model):
+        return list(getattr(self, "cache_dependencies", None) or [model])
+
+    def get_representation_params(self):
+        """
+        Return the request's query parameters in a canonical order, as part
+        of the version of the representation they select.
+        """
+        return sorted(self.request.query_params.lists())
+
+    def get_validators(self, cached=False):
+        """
+        Return the `ETag` / `Last-Modified` headers of the requested resource,
+        computed without loading or serializing any row, or None.
+
+        With `cached`, the headers are memoized under the current generations
+        of the viewset's models; preconditions of writes never use it.
+        """
+        field = self.conditional_field
+        model = getattr(self.queryset, "model", None)
+        if field is None or model is None:
+            return None
+        if not any(f.name == field for f in model._meta.concrete_fields):
+            return None
+
+        generations = get_generations(*self.get_conditional_dependencies(model))
+        if cached:
+            cache = get_cache()
+            key = make_cache_key(
+                "validators",
+                f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+                self.request.path,
+                self.get_representation_params(),
+                translation.get_language(),
+                generations,
+            )
+            validators = cache.get(key)
+            if validators is None:
+                validators = self.get_validators() or {}
+                cache.set(key, validators)
+            return validators or None
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if lookup_url_kwarg in self.kwargs:
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            last_modified = (
+                queryset.filter(**lookup).values_list(field, flat=True).first()
+            )
+            if last_modified is None:
+                return None
+            # The representation also depends on `?fields` / `?expand`, the
+            # language and the related lookups, not only on the row. The
+            # model's own generation is left out: writes to other rows must
+            # not change this row's version (its `updated_at` covers it).
+            related = [
+                dependency
+                for dependency in self.get_conditional_dependencies(model)
+                if dependency is not model
+            ]
+            version = (
+                model._meta.label_lower,
+                lookup,
+                last_modified.isoformat(),
+                self.get_representation_params(),
+                translation.get_language(),
+                get_generations(*related),
+            )
+        elif self.action == "list":
+            stats = queryset.aggregate(last=Max(field), count=Count("pk"))
+            last_modified = stats["last"]
+            version = (
+                model._meta.label_lower,
+                stats["count"],
+                last_modified and last_modified.isoformat(),
+                self.get_representation_params(),
+                translation.get_language(),
+                generations,
+            )
+        else:
+            return None
+
+        digest = make_cache_key("etag", version).rsplit(":", 1)[-1]
+        validators = {"ETag": quote_etag(digest)}
+        if last_modified is not None:
+            validators["Last-Modified"] = http_date(last_modified.timestamp())
+        return validators
+
+    def check_conditional_request(self, request):
+        """
+        Evaluate conditional request headers against the current validators.
+        """
+        self._validators = None
+        headers = request.headers
+
+        if request.method in ("GET", "HEAD"):
+            if self.action not in ("list", "retrieve"):
+                return
+            # Sent with every 200 response so clients can revalidate later.
+            validators = self._validators = self.get_validators(cached=True)
+            if validators is None:
+                return
+            if "If-None-Match" in headers:
+                # Weak comparison: `W/"x"` matches `"x"`.
+                etags = {
+                    tag.removeprefix("W/")
+                    for tag in parse_etags(headers["If-None-Match"])
+                }
+                not_modified = "*" in etags or validators["ETag"] in etags
+            elif "If-Modified-Since" in headers:
+                since = parse_http_date_safe(headers["If-Modified-Since"])
+                last_modified = parse_http_date_safe(
+                    validators.get("Last-Modified", "")
+                )
+                not_modified = bool(since and last_modified and last_modified <= since)
+            else:
+                not_modified = False
+            if not_modified:
+                raise NotModified(headers=validators)
+
+        elif request.method in ("PUT", "PATCH", "DELETE"):
+            if "If-Match" not in headers and "If-Unmodified-Since" not in headers:
+                return
+            validators = self.get_validators() or {}
+            if "If-Match" in headers:
+                # Strong comparison against the row as stored right now.
+                etags = parse_etags(headers["If-Match"])
+                if not validators or (
+                    "*" not in etags and validators["ETag"] not in etags
+                ):
+                    raise PreconditionFailed()
+            else:
+                since = parse_http_date_safe(headers["If-Unmodified-Since"])
+                last_modified = parse_http_date_safe(
+                    validators.get("Last-Modified", "")
+                )
+                if since and last_modified and last_modified > since:
+                    raise PreconditionFailed()
+
+    def check_query_count(self, queries):
+        """
+        Fail loudly when an action exceeds its `expected_query_counts` budget.
+        """
+        expected = self.expected_query_counts.get(self.action)
+        if expected is not None and len(queries) > expected:
+            raise AssertionError(
+                "%s.%s ran %d queries (expected at most %d):\n%s"
+                % (
+                    self.__class__.__name__,
+                    self.action,
+                    len(queries),
+                    expected,
+                    "\n".join(query["sql"] for query in queries),
+                )
+            )
 
 
 class BaseCRUDViewSet(
+    BulkModelMixin,
+    BatchRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -68,13 +474,19 @@ class BaseCRUDViewSet(
     Inherits:
     - BaseParsedViewSet (pagination, filtering, parsing)
     - DRF mixins for standard CRUD methods
+    - BulkModelMixin for bulk writes (JSON arrays)
+    - BatchRetrieveMixin for multi-get by ids or slugs
 
     Endpoints:
     - POST   /api/resource/        -> create object
     - GET    /api/resource/        -> list all
     - GET    /api/resource/{id}/   -> retrieve object
+    - GET    /api/resource/batch/?ids=1,2 -> retrieve many objects
     - PUT    /api/resource/{id}/   -> update object
     - DELETE /api/resource/{id}/   -> delete object
+    - POST   /api/resource/bulk/   -> create many objects
+    - PATCH  /api/resource/bulk/   -> update many objects
+    - DELETE /api/resource/bulk/   -> delete many objects
     """
 
     pass
@@ -109,6 +521,7 @@ class RetrieveOnlyViewSet(mixins.RetrieveModelMixin, BaseParsedViewSet):
 
 
 class ReadOnlyListRetrieveViewSet(
+    BatchRetrieveMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     BaseParsedViewSet,
@@ -119,6 +532,7 @@ class ReadOnlyListRetrieveViewSet(
     Endpoints:
     - GET /api/resource/        -> list all (with pagination/filtering)
     - GET /api/resource/{id}/   -> retrieve a single resource
+    - GET /api/resource/batch/?ids=1,2 -> retrieve several resources
 
     No write (POST/PUT/DELETE) actions allowed.
 
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class FacilitiesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.facilities"
+
+    def ready(self):
+        # Connect cache invalidation and search index receivers
+        from django.db.models.signals import post_migrate
+
+        from apps.facilities import signals
+
+        post_migrate.connect(signals.install_facility_search_index, sender=self)
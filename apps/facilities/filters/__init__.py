@@ -0,0 +1,7 @@
+from .facilities import (
+    MedicalFacilityFilterSet,
+)
+
+__all__ = [
+    "MedicalFacilityFilterSet",
+]
@@ -0,0 +1,83 @@
+"""
+============================================================
+Medical Facility FilterSets - H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file defines the django-filter FilterSets of the facilities app.
+
+Includes:
+    - MedicalFacilityFilterSet: Exact / `in` filters on the classification,
+      location and status columns plus date ranges, e.g.
+
+        ?type=1,2&province=Tehran&is_active=true
+        ?ownership_slug=public&city=Shiraz
+        ?updated_at_after=2025-01-01T00:00:00Z
+
+Every filter compares a column (or a unique lookup slug) for equality or a
+range, so each one resolves through an index of `MedicalFacility.Meta.indexes`,
+a foreign key index or the lookup tables' unique slugs, instead of the
+`ILIKE` scans of free-text `search`.
+
+License: GPLv2
+"""
+
+import django_filters as filters
+
+from apps.facilities.models import MedicalFacility
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
+
+
+class MedicalFacilityFilterSet(filters.FilterSet):
+    """
+    FilterSet for MedicalFacility list, export and keyset queries.
+
+    `in` filters take comma separated values (`?province=Tehran,Fars`).
+    """
+
+    # Classification, by id or by slug
+    type = NumberInFilter(field_name="type", lookup_expr="in")
+    type_slug = CharInFilter(field_name="type__slug", lookup_expr="in")
+    subtype = NumberInFilter(field_name="subtype", lookup_expr="in")
+    subtype_slug = CharInFilter(field_name="subtype__slug", lookup_expr="in")
+    ownership = NumberInFilter(field_name="ownership", lookup_expr="in")
+    ownership_slug = CharInFilter(field_name="ownership__slug", lookup_expr="in")
+
+    # Location
+    province = CharInFilter(field_name="province", lookup_expr="in")
+    city = CharInFilter(field_name="city", lookup_expr="in")
+
+    # Status and dates (`<name>_after` / `<name>_before`)
+    is_active = filters.BooleanFilter(field_name="is_active")
+    created_at = filters.IsoDateTimeFromToRangeFilter(field_name="created_at")
+    updated_at = filters.IsoDateTimeFromToRangeFilter(field_name="updated_at")
+
+    class Meta:
+        model = MedicalFacility
+        fields = [
+            "type",
+            "type_slug",
+            "subtype",
+            "subtype_slug",
+            "ownership",
+            "ownership_slug",
+            "province",
+            "city",
+            "is_active",
+            "created_at",
+            "updated_at",
+        ]
@@ -0,0 +1,160 @@
+"""
+============================================================
+JSON Renderer Benchmark Command - H.CORE Project
+============================================================
+
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+`manage.py benchmark_json` compares DRF's stdlib `JSONRenderer` /
+`JSONParser` with `apps.common`'s `FastJSONRenderer` / `FastJSONParser` on
+paginated `MedicalFacility` list pages.
+
+How it works:
+    - Pages are built like the list endpoint builds them (`list_fields`
+      unless `--full`), from unsaved in-memory facilities with Persian
+      names and HTML profile texts, so no database rows are needed
+    - Each renderer / parser runs `--repeat` times per page; the best run
+      is reported (milliseconds per page) with the speedup
+    - Both renderers' outputs are decoded and compared before timing
+
+Usage Example:
+--------------
+    python manage.py benchmark_json
+    python manage.py benchmark_json --page-size 100 --full --repeat 200
+
+License: GPLv2
+"""
+
+import json
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.parsers import FastJSONParser
+from apps.common.renderers import FastJSONRenderer, orjson
+from apps.facilities.models import MedicalFacility
+from apps.facilities.serializers import MedicalFacilitySerializer
+from apps.facilities.views import MedicalFacilityViewSet
+
+HISTORY = (
+    "<p>بیمارستان در سال ۱۳۴۵ تأسیس شد و امروز یکی از مراکز آموزشی و درمانی "
+    "اصلی استان است.</p>"
+    "<ul><li>Emergency &amp; trauma care</li><li>Cardiology</li></ul>"
+) * 8
+
+
+class Command(BaseCommand):
+    help = "Benchmark the JSON renderer and parser on MedicalFacility pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=10,
+            help="Facilities per page (default: 10).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=100,
+            help="Timed runs per renderer and parser (default: 100).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Render every field, like retrieve or ?fields=*.",
+        )
+
+    def handle(self, *args, **options):
+        page_size, repeat = options["page_size"], options["repeat"]
+        if page_size < 1 or repeat < 1:
+            raise CommandError("--page-size and --repeat must be positive.")
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson is not installed: the fast classes use the stdlib."
+                )
+            )
+
+        data = self.build_page(page_size, None if options["full"] else "list")
+        drf = JSONRenderer().render(data)
+        fast = FastJSONRenderer().render(data)
+        if json.loads(drf) != json.loads(fast):
+            raise CommandError("The renderers produced different documents.")
+        self.stdout.write(
+            f"Page of {page_size} facilities: {len(drf) / 1024:.1f} KiB of JSON"
+        )
+
+        self.report(
+            "render",
+            self.best(lambda: JSONRenderer().render(data), repeat),
+            self.best(lambda: FastJSONRenderer().render(data), repeat),
+        )
+        self.report(
+            "parse",
+            self.best(lambda: JSONParser().parse(BytesIO(drf)), repeat),
+            self.best(lambda: FastJSONParser().parse(BytesIO(drf)), repeat),
+        )
+
+    def build_page(self, page_size, fields):
+        """
+        Return the paginated response data of one list page.
+        """
+        now = timezone.now()
+        facilities = [
+            MedicalFacility(
+                pk=i + 1,
+                slug=f"facility-{i + 1}",
+                name=f"بیمارستان شماره {i + 1}",
+                type_id=1 + i % 3,
+                subtype_id=None if i % 4 == 0 else 1 + i % 5,
+                ownership_id=1 + i % 2,
+                history=HISTORY,
+                presentation=HISTORY,
+                legal_charters=HISTORY,
+                city="شیراز",
+                province="فارس",
+                postal_code="7134814336",
+                phone_number="+98 71 3647 4331",
+                email=f"info{i + 1}@example.com",
+                website=f"https://facility-{i + 1}.example.com",
+                logo=f"facility_logos/{i + 1}.png" if i % 2 else "",
+                is_active=i % 7 != 0,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(page_size)
+        ]
+        if fields == "list":
+            fields = MedicalFacilityViewSet.list_fields
+        results = MedicalFacilitySerializer(facilities, many=True, fields=fields).data
+        return {
+            "count": page_size * 20,
+            "next": "https://api.example.com/medical_facility/?page=2",
+            "previous": None,
+            "results": results,
+        }
+
+    def best(self, function, repeat):
+        timings = []
+        for _run in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    def report(self, operation, drf, fast):
+        self.stdout.write(
+            f"{operation:>6}: DRF {drf:.3f} ms, fast {fast:.3f} ms "
+            f"({drf / fast if fast else 0:.1f}x)"
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+from apps.common.search import build_search_document, get_search_backend
+
+SEARCH_DOCUMENT_FIELDS = [
+    "name",
+    "city",
+    "province",
+    "type__title",
+    "subtype__title",
+    "ownership__title",
+]
+
+
+def populate_search_documents(apps, schema_editor):
+    MedicalFacility = apps.get_model("facilities", "MedicalFacility")
+    queryset = MedicalFacility.objects.using(schema_editor.connection.alias)
+    batch = []
+    for facility in queryset.select_related("type", "subtype", "ownership").iterator(
+        chunk_size=500
+    ):
+        facility.search_document = build_search_document(
+            facility, SEARCH_DOCUMENT_FIELDS
+        )
+        batch.append(facility)
+        if len(batch) >= 500:
+            queryset.bulk_update(batch, ["search_document"])
+            batch = []
+    if batch:
+        queryset.bulk_update(batch, ["search_document"])
+
+
+def install_search_index(apps, schema_editor):
+    MedicalFacility = apps.get_model("facilities", "MedicalFacility")
+    get_search_backend(schema_editor.connection.alias).install(MedicalFacility)
+
+
+def uninstall_search_index(apps, schema_editor):
+    MedicalFacility = apps.get_model("facilities", "MedicalFacility")
+    get_search_backend(schema_editor.connection.alias).uninstall(MedicalFacility)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0002_medicalfacility_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalfacility',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:30
+
+from django.db import migrations
+from django.db.models import Count, Min, Q
+
+from apps.common.slugs import allocate_slugs, build_slug_from
+
+SLUG_FIELDS = ["name", "city"]
+BATCH_SIZE = 500
+
+
+def backfill_slugs(apps, schema_editor):
+    """
+    Give a unique slug to every facility before the unique index is built.
+
+    Blank slugs, the `1` placeholder left by 0002 and all but the oldest row
+    of each duplicated slug are rebuilt from `SLUG_FIELDS`, one batch (and
+    one allocation query) at a time.
+    """
+    MedicalFacility = apps.get_model("facilities", "MedicalFacility")
+    alias = schema_editor.connection.alias
+    queryset = MedicalFacility.objects.using(alias)
+    max_length = MedicalFacility._meta.get_field("slug").max_length
+
+    duplicates = (
+        queryset.exclude(slug__in=["", "1"])
+        .order_by()
+        .values("slug")
+        .annotate(rows=Count("pk"), keep=Min("pk"))
+        .filter(rows__gt=1)
+    )
+    keep = [row["keep"] for row in duplicates]
+    pending = (
+        queryset.filter(
+            Q(slug__in=["", "1"])
+            | Q(slug__in=duplicates.values("slug"))
+        )
+        .exclude(pk__in=keep)
+        .order_by("pk")
+    )
+
+    last_pk = 0
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk).only("pk", "slug", *SLUG_FIELDS)[
+                :BATCH_SIZE
+            ]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        bases = [
+            build_slug_from(
+                {field: getattr(facility, field) for field in SLUG_FIELDS},
+                SLUG_FIELDS,
+                max_length,
+            )
+            for facility in batch
+        ]
+        slugs = allocate_slugs(
+            MedicalFacility,
+            bases,
+            exclude_pks=[facility.pk for facility in batch],
+            using=alias,
+        )
+        for facility, slug in zip(batch, slugs):
+            facility.slug = slug
+        queryset.bulk_update(batch, ["slug"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0003_medicalfacility_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_slugs, migrations.RunPython.noop),
+    ]
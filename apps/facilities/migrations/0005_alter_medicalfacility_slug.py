@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+from apps.common.search import get_search_backend
+
+
+def install_search_index(apps, schema_editor):
+    # SQLite rebuilds the table for the new index, dropping its FTS triggers.
+    MedicalFacility = apps.get_model("facilities", "MedicalFacility")
+    get_search_backend(schema_editor.connection.alias).install(MedicalFacility)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0004_backfill_medicalfacility_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='medicalfacility',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0005_alter_medicalfacility_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(fields=['-created_at', '-id'], name='facility_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='facility_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(fields=['province', 'city'], name='facility_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(fields=['type', 'is_active'], name='facility_type_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(fields=['updated_at', 'id'], name='facility_updated_idx'),
+        ),
+    ]
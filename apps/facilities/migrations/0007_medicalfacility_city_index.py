@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0006_medicalfacility_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalfacility',
+            index=models.Index(fields=['city'], name='facility_city_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0007_medicalfacility_city_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalFacilityTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.BigIntegerField(verbose_name='Deleted Facility ID')),
+                ('slug', models.SlugField(db_index=False)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Medical Facility Tombstone',
+                'verbose_name_plural': 'Medical Facility Tombstones',
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='facility_tombstone_idx')],
+            },
+        ),
+    ]
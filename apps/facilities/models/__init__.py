@@ -3,6 +3,7 @@ from .facilities import (
     MedicalFacilityType,
     MedicalFacilitySubType,
     MedicalFacilityOwnershipType,
+    MedicalFacilityTombstone,
 )
 
 __all__ = [
@@ -10,4 +11,5 @@ __all__ = [
     "MedicalFacilityType",
     "MedicalFacilitySubType",
     "MedicalFacilityOwnershipType",
+    "MedicalFacilityTombstone",
 ]
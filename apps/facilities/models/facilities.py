@@ -20,6 +20,12 @@ This file includes the following models:
     - MedicalFacilityOwnershipType: Ownership/governance type (e.g., Public, Private)
     - MedicalFacility:          Represents a detailed instance of a facility with contact info,
                                 history, mission, and legal documentation.
+    - MedicalFacilityTombstone: Record of a deleted facility, served by the
+                                delta sync feed so clients can drop it too.
+
+The type, subtype, ownership and facility models track their changed fields
+(`DirtyFieldsMixin`), so updates write only the changed columns and send
+change sets (`changes_saved`) to the cache invalidation receivers.
 
 These models are designed to be reused across the platform to ensure a normalized,
 scalable structure for managing healthcare centers and hospitals.
@@ -28,10 +34,14 @@ License: GPLv2
 """
 
 from django.db import models
+from django.utils import timezone
 from tinymce.models import HTMLField
 
+from apps.common.search import SearchDocumentMixin
+from apps.common.tracking import DirtyFieldsMixin
+
 
-class MedicalFacilityType(models.Model):
+class MedicalFacilityType(DirtyFieldsMixin, models.Model):
     """
     Main category for medical facilities.
 
@@ -47,7 +57,7 @@ class MedicalFacilityType(models.Model):
         return self.title
 
 
-class MedicalFacilitySubType(models.Model):
+class MedicalFacilitySubType(DirtyFieldsMixin, models.Model):
     """
     Describes the specialty or function of the facility.
 
@@ -68,7 +78,7 @@ class MedicalFacilitySubType(models.Model):
         return self.title
 
 
-class MedicalFacilityOwnershipType(models.Model):
+class MedicalFacilityOwnershipType(DirtyFieldsMixin, models.Model):
     """
     Indicates the governance or funding model of the facility.
 
@@ -90,11 +100,24 @@ class MedicalFacilityOwnershipType(models.Model):
         return self.title
 
 
-class MedicalFacility(models.Model):
+class MedicalFacility(SearchDocumentMixin, DirtyFieldsMixin, models.Model):
     """
     Represents an individual medical facility.
+
+    `search_document` denormalizes the searchable text (including the related
+    type/subtype/ownership titles) and is indexed by `apps.common.search`.
     """
-    slug = models.SlugField()
+
+    search_document_fields = [
+        "name",
+        "city",
+        "province",
+        "type__title",
+        "subtype__title",
+        "ownership__title",
+    ]
+
+    slug = models.SlugField(unique=True)
     name = models.CharField(max_length=255, verbose_name="Facility Name")
 
     type = models.ForeignKey(
@@ -155,6 +178,7 @@ class MedicalFacility(models.Model):
     )
 
     is_active = models.BooleanField(default=True)
+    search_document = models.TextField(blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -162,6 +186,45 @@ class MedicalFacility(models.Model):
         verbose_name = "Medical Facility"
         verbose_name_plural = "Medical Facilities"
         ordering = ["-created_at"]
+        indexes = [
+            # Default (newest first) listing, with `id` as keyset tiebreaker
+            models.Index(fields=["-created_at", "-id"], name="facility_created_idx"),
+            # The public listing only shows active facilities
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="facility_active_created_idx",
+            ),
+            # Location filters: province alone, or province and city; city alone
+            models.Index(fields=["province", "city"], name="facility_location_idx"),
+            models.Index(fields=["city"], name="facility_city_idx"),
+            models.Index(fields=["type", "is_active"], name="facility_type_active_idx"),
+            # Incremental sync: rows changed since an (updated_at, id) cursor
+            models.Index(fields=["updated_at", "id"], name="facility_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class MedicalFacilityTombstone(models.Model):
+    """
+    Marks a deleted MedicalFacility for incremental sync clients.
+
+    Written by a `post_delete` receiver and read in `(deleted_at, id)` order
+    by the `changes` endpoint of `MedicalFacilityViewSet`.
+    """
+
+    object_id = models.BigIntegerField(verbose_name="Deleted Facility ID")
+    slug = models.SlugField(max_length=50, db_index=False)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Medical Facility Tombstone"
+        verbose_name_plural = "Medical Facility Tombstones"
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="facility_tombstone_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.slug} ({self.object_id})"
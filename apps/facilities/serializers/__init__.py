@@ -1,5 +1,13 @@
-from .facilities import MedicalFacilitySerializer
+from .facilities import (
+    MedicalFacilitySerializer,
+    MedicalFacilityTypeSerializer,
+    MedicalFacilitySubTypeSerializer,
+    MedicalFacilityOwnershipTypeSerializer,
+)
 
 __all__ = [
     "MedicalFacilitySerializer",
+    "MedicalFacilityTypeSerializer",
+    "MedicalFacilitySubTypeSerializer",
+    "MedicalFacilityOwnershipTypeSerializer",
 ]
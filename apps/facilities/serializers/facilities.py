@@ -14,13 +14,19 @@ Repository:    https://github.com/Hcore-ir/backend-core
 Description:
 -------------
 This file includes:
+    - MedicalFacilityTypeSerializer, MedicalFacilitySubTypeSerializer,
+      MedicalFacilityOwnershipTypeSerializer: Compact (id, slug, title)
+      representations of the lookup models.
     - MedicalFacilitySerializer: Serializer for the MedicalFacility model, handling
       full facility profile, classification, contact information, and metadata.
+      `type`, `subtype` and `ownership` are primary keys unless expanded;
+      both are served from cached lookup tables.
 
 It leverages the custom BaseModelSerializer which provides:
     - Automatic slug generation (if `slug_fields` is defined in Meta)
     - Consistent handling of read-only fields (`created_at`, `updated_at`, `slug`)
     - Proper ManyToMany field handling in create/update
+    - A compiled fast read path (`Meta.fast_read`), enabled on all of them
 
 These serializers are used in views and APIs to enforce a consistent structure
 and simplify data handling for medical facility resources.
@@ -37,17 +43,62 @@ from apps.facilities.models import (
 )
 
 
+class MedicalFacilityTypeSerializer(BaseModelSerializer):
+    """
+    Serializer for the MedicalFacilityType lookup model.
+    """
+
+    class Meta:
+        model = MedicalFacilityType
+        fields = ["id", "slug", "title"]
+        fast_read = True
+
+
+class MedicalFacilitySubTypeSerializer(BaseModelSerializer):
+    """
+    Serializer for the MedicalFacilitySubType lookup model.
+    """
+
+    class Meta:
+        model = MedicalFacilitySubType
+        fields = ["id", "slug", "title"]
+        fast_read = True
+
+
+class MedicalFacilityOwnershipTypeSerializer(BaseModelSerializer):
+    """
+    Serializer for the MedicalFacilityOwnershipType lookup model.
+    """
+
+    class Meta:
+        model = MedicalFacilityOwnershipType
+        fields = ["id", "slug", "title"]
+        fast_read = True
+
+
 class MedicalFacilitySerializer(BaseModelSerializer):
     """
     Serializer for the MedicalFacility model.
     Includes full profile, classification, contact, and metadata fields.
+    `?expand=type,subtype,ownership` inlines the related lookup objects.
     """
 
     class Meta:
         model = MedicalFacility
-        read_only_fields = ["created_at", "updated_at", "slug"]
+        read_only_fields = ["id", "created_at", "updated_at", "slug"]
         slug_fields = ["name", "city"]
+        # Validated and expanded from in-process lookup tables
+        cached_lookup_fields = ["type", "subtype", "ownership"]
+        # Compiled representation (`BaseModelSerializer` fast read path)
+        fast_read = True
+        expandable_fields = {
+            "type": MedicalFacilityTypeSerializer,
+            "subtype": MedicalFacilitySubTypeSerializer,
+            "ownership": MedicalFacilityOwnershipTypeSerializer,
+        }
         fields = [
+            "id",
+            "slug",
             "name",
             "type",
             "subtype",
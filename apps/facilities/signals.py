@@ -0,0 +1,109 @@
+"""
+================================================================================
+Medical Facility Signal Receivers - H.CORE Project
+================================================================================
+
+This module connects the medical facility models to the shared cache
+invalidation utilities of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+Every write to a facility model bumps that model's cache generation (see
+`apps.common.cache`) once its transaction commits, which invalidates cached
+values derived from it, such as the cached list counts of
+`StandardResultsSetPagination`. Saves are seen through their change sets
+(`apps.common.tracking.changes_saved`), so a save that changed no field
+invalidates nothing.
+
+The search index of `MedicalFacility` (see `apps.common.search`) is kept in
+step as well: renaming a type, subtype or ownership (a change of a field the
+search documents embed) rebuilds the search documents of its facilities, and
+the database-side index objects are (re)installed after every `migrate`.
+
+Deleting a facility also records a `MedicalFacilityTombstone`, so the delta
+sync feed (`changes` endpoint) can report the deletion.
+
+The receivers are connected when the app is ready (`FacilitiesConfig.ready`).
+
+License: GPLv2
+"""
+
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate
+from django.dispatch import receiver
+
+from apps.common.cache import bump_generation_on_commit
+from apps.common.search import get_search_backend, refresh_search_documents
+from apps.common.tracking import changes_saved
+from apps.facilities.models import (
+    MedicalFacility,
+    MedicalFacilityType,
+    MedicalFacilitySubType,
+    MedicalFacilityOwnershipType,
+    MedicalFacilityTombstone,
+)
+
+CACHED_MODELS = [
+    MedicalFacility,
+    MedicalFacilityType,
+    MedicalFacilitySubType,
+    MedicalFacilityOwnershipType,
+]
+
+
+# Lookup fields embedded in the facility search documents (e.g. "title")
+SEARCH_LOOKUP_FIELDS = {
+    path.split("__", 1)[1]
+    for path in MedicalFacility.search_document_fields
+    if "__" in path
+}
+
+
+@receiver(changes_saved, dispatch_uid="facilities_bump_generation_on_save")
+@receiver(post_delete, dispatch_uid="facilities_bump_generation_on_delete")
+def bump_facility_generation(sender, instance, changed_fields=None, **kwargs):
+    """
+    Invalidate cached values derived from the written facility model, once
+    the write is committed.
+    """
+    if sender in CACHED_MODELS and changed_fields != frozenset():
+        bump_generation_on_commit(sender, using=instance._state.db)
+
+
+@receiver(post_delete, sender=MedicalFacility)
+def record_facility_tombstone(sender, instance, using, **kwargs):
+    """
+    Remember the deleted facility for incremental sync clients.
+    """
+    MedicalFacilityTombstone.objects.using(using).create(
+        object_id=instance.pk, slug=instance.slug
+    )
+
+
+@receiver(changes_saved, sender=MedicalFacilityType)
+@receiver(changes_saved, sender=MedicalFacilitySubType)
+@receiver(changes_saved, sender=MedicalFacilityOwnershipType)
+def refresh_facility_search_documents(
+    sender, instance, created, changed_fields, **kwargs
+):
+    """
+    Re-denormalize the search documents of facilities using a renamed lookup.
+    """
+    if created:
+        return
+    if changed_fields is None or changed_fields & SEARCH_LOOKUP_FIELDS:
+        refresh_search_documents(instance.facilities.all())
+
+
+def install_facility_search_index(sender, using, **kwargs):
+    """
+    Ensure the search index objects exist (e.g. SQLite triggers are lost
+    whenever a migration rebuilds the table).
+    """
+    connection = connections[using]
+    if MedicalFacility._meta.db_table in connection.introspection.table_names():
+        get_search_backend(using).install(MedicalFacility)
@@ -1,3 +1,964 @@
-from django.test import TestCase
+"""
+============================================================
+Facilities App Tests - H.CORE Project
+============================================================
 
-# Create your tests here.
+This module is part of the H.CORE backend system.
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+Tests for the facilities app:
+    - MedicalFacilityIndexTests: the query plans of the viewset's list
+      queries (ordering and `MedicalFacilityFilterSet` filters) use the
+      `MedicalFacility.Meta.indexes` built for them (PostgreSQL and SQLite)
+    - MedicalFacilitySerializerFastReadTests: the compiled fast read path of
+      the facility serializers renders byte-identical JSON to DRF's and
+      keeps a bounded number of compiled plans
+    - FastJSONRendererTests: `FastJSONRenderer` / `FastJSONParser` agree with
+      DRF's stdlib classes on facility pages and non-JSON Python types
+    - MedicalFacilityChangeTrackingTests: serializer updates write only the
+      changed columns and skip unchanged rows (`DirtyFieldsMixin`); writes
+      bump the cache generation once committed
+    - MedicalFacilityKeysetPaginationTests: cursor pages follow the default
+      newest-first ordering, load their keys with sparse fieldsets, and
+      forged cursors answer 404
+    - ImportFacilitiesCommandTests: `import_facilities` reads CSV and NDJSON,
+      upserts rows by their explicit slug, allocates the others and reports
+      repeated slugs
+    - MedicalFacilityExportTests: `export` streams CSV and NDJSON, chosen by
+      `Accept` or `export_format`
+    - MedicalFacilityChangesFeedTests: the `changes` sync feed pages through
+      changed rows and deletion tombstones, and rejects malformed cursors
+    - MedicalFacilityConditionalRequestTests: detail ETags change with the
+      selected representation and with the related lookups
+    - MedicalFacilityBulkTests: the `bulk/` endpoint allocates unique slugs,
+      reports partial failures (207), writes nothing on `?atomic=true`
+      errors, updates only the changed columns and checks object permissions
+    - SlugAllocationTests: `allocate_slugs` suffixes collisions within a batch
+      and with existing rows within `max_length`, writers allocate again
+      after losing a slug race, and migration 0004 backfills unique slugs
+    - StreamingMultiPartParserTests: multipart uploads answer 413 for an
+      oversized `Content-Length` or file (deleting the partial temporary
+      file) and 415 for a disallowed file type; JSON bodies still parse
+
+License: GPLv2
+"""
+
+import csv
+import json
+import os
+import tempfile
+import uuid
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.apps import apps as django_apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.common.cache import get_generation
+from apps.common.parsers import FastJSONParser
+from apps.common.renderers import FastJSONRenderer
+from apps.common.slugs import allocate_slugs
+from apps.common.serializers import readers
+from apps.facilities.models import (
+    MedicalFacility,
+    MedicalFacilityType,
+    MedicalFacilitySubType,
+    MedicalFacilityOwnershipType,
+    MedicalFacilityTombstone,
+)
+from apps.facilities.serializers import (
+    MedicalFacilitySerializer,
+    MedicalFacilityTypeSerializer,
+)
+from apps.facilities.views import MedicalFacilityViewSet
+
+
+@skipUnless(
+    connection.vendor in ("postgresql", "sqlite"),
+    "Query plan assertions are written for PostgreSQL and SQLite.",
+)
+class MedicalFacilityIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+        cls.clinic = MedicalFacilityType.objects.create(slug="clinic", title="Clinic")
+        ownership = MedicalFacilityOwnershipType.objects.create(
+            slug="public", title="Public"
+        )
+        provinces = ["Tehran", "Fars", "Isfahan", "Gilan", "Khorasan"]
+        MedicalFacility.objects.bulk_create(
+            MedicalFacility(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=cls.clinic if i % 20 == 0 else cls.hospital,
+                ownership=ownership,
+                province=provinces[i % len(provinces)],
+                city=f"City {i % 40}",
+                is_active=i % 10 != 0,
+            )
+            for i in range(500)
+        )
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {MedicalFacility._meta.db_table}")
+                # Small test tables are cheaper to scan; ask for the plan an
+                # index would give on a production-sized table.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def get_list_queryset(self, query=""):
+        """
+        Return the queryset `MedicalFacilityViewSet.list` builds for `query`.
+        """
+        request = Request(APIRequestFactory().get(f"/medical_facility/?{query}"))
+        view = MedicalFacilityViewSet(
+            action="list", request=request, kwargs={}, format_kwarg=None
+        )
+        return view.filter_queryset(view.get_queryset())
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}")
+
+    def test_default_listing(self):
+        queryset = self.get_list_queryset()
+        self.assertUsesIndex(queryset[:25], "facility_created_idx")
+
+    def test_active_listing(self):
+        queryset = self.get_list_queryset("is_active=true")
+        self.assertUsesIndex(queryset[:25], "facility_active_created_idx")
+
+    def test_keyset_listing(self):
+        request = Request(
+            APIRequestFactory().get("/medical_facility/?pagination=cursor")
+        )
+        view = MedicalFacilityViewSet(
+            action="list", request=request, kwargs={}, format_kwarg=None
+        )
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        ordering = paginator.get_ordering(request, queryset, view)
+        self.assertEqual(ordering, ("-created_at", "-id"))
+        self.assertUsesIndex(
+            queryset.order_by(*ordering)[:25], "facility_created_idx"
+        )
+
+    def test_location_filter(self):
+        queryset = self.get_list_queryset("province=Fars&city=City+1")
+        self.assertUsesIndex(queryset, "facility_location_idx")
+
+    def test_city_filter(self):
+        queryset = self.get_list_queryset("city=City+1,City+2")
+        self.assertUsesIndex(queryset, "facility_city_idx")
+
+    def test_type_filter(self):
+        queryset = self.get_list_queryset(f"type={self.clinic.pk}&is_active=true")
+        self.assertUsesIndex(queryset, "facility_type_active_idx")
+
+    def test_changed_since(self):
+        since = timezone.now() - timedelta(minutes=5)
+        queryset = MedicalFacility.objects.filter(updated_at__gt=since).order_by(
+            "updated_at", "id"
+        )
+        self.assertUsesIndex(queryset[:100], "facility_updated_idx")
+
+
+class DRFMedicalFacilitySerializer(MedicalFacilitySerializer):
+    class Meta(MedicalFacilitySerializer.Meta):
+        fast_read = False
+
+
+class DRFMedicalFacilityTypeSerializer(MedicalFacilityTypeSerializer):
+    class Meta(MedicalFacilityTypeSerializer.Meta):
+        fast_read = False
+
+
+class MedicalFacilitySerializerFastReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        hospital = MedicalFacilityType.objects.create(slug="hospital", title="Hospital")
+        general = MedicalFacilitySubType.objects.create(slug="general", title="General")
+        ownership = MedicalFacilityOwnershipType.objects.create(
+            slug="public", title="Public"
+        )
+        for i in range(6):
+            MedicalFacility.objects.create(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=hospital,
+                subtype=general if i % 2 else None,
+                ownership=ownership if i % 3 else None,
+                city="Shiraz",
+                province="Fars",
+                history="<p>History</p>" if i % 2 else "",
+                email=f"info{i}@example.com" if i % 2 else "",
+                logo=f"facility_logos/{i}.png" if i % 2 else "",
+                is_active=bool(i % 2),
+            )
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get("/medical_facility/"))
+
+    def render(self, serializer_class, data, **kwargs):
+        kwargs.setdefault("context", {"request": self.request})
+        return JSONRenderer().render(serializer_class(data, **kwargs).data)
+
+    def assertParity(self, data, **kwargs):
+        fast = self.render(MedicalFacilitySerializer, data, **kwargs)
+        drf = self.render(DRFMedicalFacilitySerializer, data, **kwargs)
+        self.assertEqual(fast, drf)
+
+    def test_instances(self):
+        facilities = list(MedicalFacility.objects.order_by("id"))
+        self.assertParity(facilities, many=True)
+        self.assertParity(facilities[1])
+
+    def test_queryset_values(self):
+        self.assertParity(MedicalFacility.objects.order_by("id"), many=True)
+
+    def test_without_request(self):
+        self.assertParity(MedicalFacility.objects.order_by("id"), many=True, context={})
+
+    def test_sparse_and_expanded(self):
+        queryset = MedicalFacility.objects.order_by("id")
+        self.assertParity(
+            queryset, many=True, fields=["id", "name", "type", "logo"], exclude=["id"]
+        )
+        self.assertParity(queryset, many=True, expand=["type", "subtype", "ownership"])
+        self.assertParity(list(queryset), many=True, expand=["type", "ownership"])
+
+    @mock.patch.object(readers, "PLAN_CACHE_SIZE", 2)
+    def test_plan_cache_is_bounded(self):
+        queryset = MedicalFacility.objects.order_by("id")
+        for fields in (["id"], ["id", "name"], ["id", "city"], ["name"]):
+            self.assertParity(queryset, many=True, fields=fields)
+        self.assertLessEqual(len(readers._plans), 2)
+
+    def test_lookup_serializer(self):
+        queryset = MedicalFacilityType.objects.all()
+        self.assertEqual(
+            self.render(MedicalFacilityTypeSerializer, queryset, many=True),
+            self.render(DRFMedicalFacilityTypeSerializer, queryset, many=True),
+        )
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertSameJSON(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_facility_page(self):
+        facilities = [
+            MedicalFacility(
+                pk=i,
+                slug=f"facility-{i}",
+                name=f"بیمارستان {i}",
+                type_id=1,
+                subtype_id=None,
+                history="<p>Line\u2028break</p>",
+                city="شیراز",
+                province="فارس",
+                logo="facility_logos/1.png" if i % 2 else "",
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            for i in range(1, 4)
+        ]
+        data = {
+            "count": 3,
+            "next": None,
+            "results": MedicalFacilitySerializer(facilities, many=True).data,
+        }
+        self.assertSameJSON(data)
+
+        rendered = FastJSONRenderer().render(data)
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(rendered)),
+            JSONParser().parse(BytesIO(rendered)),
+        )
+
+    def test_python_types(self):
+        self.assertSameJSON(
+            {
+                "created_at": timezone.now(),
+                "date": timezone.now().date(),
+                "naive": timezone.now().replace(tzinfo=None),
+                "price": Decimal("12.50"),
+                "id": uuid.uuid4(),
+                "label": gettext_lazy("Name"),
+                "ids": (1, 2),
+                "nested": [{"a": None, "b": True}],
+            }
+        )
+
+
+class MedicalFacilityChangeTrackingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        hospital = MedicalFacilityType.objects.create(slug="hospital", title="Hospital")
+        cls.facility = MedicalFacility.objects.create(
+            slug="facility",
+            name="Facility",
+            type=hospital,
+            city="Shiraz",
+            province="Fars",
+            history="<p>History</p>" * 100,
+        )
+
+    def update(self, data):
+        facility = MedicalFacility.objects.get(pk=self.facility.pk)
+        serializer = MedicalFacilitySerializer(facility, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        return [
+            query["sql"] for query in queries if query["sql"].startswith("UPDATE")
+        ]
+
+    def test_only_changed_columns(self):
+        (update,) = self.update({"phone_number": "+98 71 1234"})
+        self.assertIn("phone_number", update)
+        self.assertIn("updated_at", update)
+        self.assertNotIn("history", update)
+        self.assertNotIn("search_document", update)
+
+    def test_unchanged_values_skip_the_write(self):
+        before = MedicalFacility.objects.get(pk=self.facility.pk).updated_at
+        self.assertEqual(self.update({"city": "Shiraz", "name": "Facility"}), [])
+        after = MedicalFacility.objects.get(pk=self.facility.pk).updated_at
+        self.assertEqual(before, after)
+
+    def test_full_save_invalidates(self):
+        facility = MedicalFacility.objects.get(pk=self.facility.pk)
+        before = get_generation(MedicalFacility)
+        with self.captureOnCommitCallbacks(execute=True):
+            facility.save()
+        self.assertNotEqual(get_generation(MedicalFacility), before)
+
+    def test_generation_bumped_on_commit(self):
+        facility = MedicalFacility.objects.get(pk=self.facility.pk)
+        before = get_generation(MedicalFacility)
+        with self.captureOnCommitCallbacks() as callbacks:
+            facility.city = "Yazd"
+            facility.save_changes()
+            # Readers must not see the new generation before the commit.
+            self.assertEqual(get_generation(MedicalFacility), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_generation(MedicalFacility), before)
+
+    def test_search_document_follows_changes(self):
+        self.update({"city": "Yazd"})
+        self.assertIn(
+            "yazd", MedicalFacility.objects.get(pk=self.facility.pk).search_document
+        )
+
+
+class MedicalFacilityKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        hospital = MedicalFacilityType.objects.create(slug="hospital", title="Hospital")
+        for i in range(5):
+            MedicalFacility.objects.create(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=hospital,
+                city="Shiraz",
+                province="Fars",
+            )
+        # Two facilities created in the same instant: `id` breaks the tie.
+        MedicalFacility.objects.filter(slug__in=["facility-1", "facility-2"]).update(
+            created_at=timezone.now()
+        )
+
+    def get_ids(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [facility["id"] for facility in response.json()["results"]]
+            url = response.json()["next"]
+        return ids
+
+    def test_default_ordering(self):
+        expected = list(
+            MedicalFacility.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(
+            self.get_ids("/medical_facility/?pagination=cursor&page_size=2"), expected
+        )
+
+    def test_sparse_fieldset_keeps_keys_loaded(self):
+        request = Request(
+            APIRequestFactory().get(
+                "/medical_facility/?pagination=cursor&fields=name&page_size=2"
+            )
+        )
+        view = MedicalFacilityViewSet(
+            action="list", request=request, kwargs={}, format_kwarg=None
+        )
+        queryset = view.filter_queryset(view.get_queryset())
+        # The page itself; building the cursor loads no deferred column.
+        with self.assertNumQueries(1):
+            view.paginator.paginate_queryset(queryset, request, view)
+            self.assertIsNotNone(view.paginator.get_next_link())
+
+    def test_invalid_cursor_values(self):
+        for position in (["not a date", 1], [{"a": 1}, 1], [None, "x"]):
+            payload = json.dumps({"p": position, "o": "-created_at,-id"})
+            cursor = urlsafe_b64encode(payload.encode()).decode()
+            response = self.client.get(f"/medical_facility/?cursor={cursor}")
+            self.assertEqual(response.status_code, 404, position)
+
+
+class ImportFacilitiesCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+        MedicalFacilityType.objects.create(slug="clinic", title="Clinic")
+
+    def run_import(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, encoding="utf-8", delete=False
+        ) as source:
+            source.write(content)
+        self.addCleanup(os.remove, source.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_facilities", source.name, *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_rows_without_slug_are_inserted(self):
+        stdout, _stderr = self.run_import(
+            "name,type,city,province\n"
+            "Sina,hospital,Tehran,Tehran\n"
+            "Sina,clinic,Tehran,Tehran\n",
+            ".csv",
+        )
+        self.assertIn("2 created, 0 updated", stdout)
+        self.assertEqual(
+            dict(MedicalFacility.objects.values_list("slug", "type__slug")),
+            {"sina-tehran": "hospital", "sina-tehran-2": "clinic"},
+        )
+
+    def test_ndjson_upserts_by_explicit_slug(self):
+        MedicalFacility.objects.create(
+            slug="razi-rasht",
+            name="Razi",
+            type=self.hospital,
+            city="Rasht",
+            province="Gilan",
+        )
+        rows = [
+            {
+                "slug": "razi-rasht",
+                "name": "Razi Hospital",
+                "type": "hospital",
+                "city": "Rasht",
+                "province": "Gilan",
+            },
+            {"name": "Razi", "type": "clinic", "city": "Rasht", "province": "Gilan"},
+        ]
+        stdout, _stderr = self.run_import(
+            "".join(json.dumps(row) + "\n" for row in rows), ".ndjson"
+        )
+        self.assertIn("1 created, 1 updated", stdout)
+        self.assertEqual(
+            dict(MedicalFacility.objects.values_list("slug", "name")),
+            {"razi-rasht": "Razi Hospital", "razi-rasht-2": "Razi"},
+        )
+
+    def test_duplicate_slugs_are_reported(self):
+        stdout, stderr = self.run_import(
+            "slug,name,type,city,province\n"
+            "razi,Razi,hospital,Rasht,Gilan\n"
+            "razi,Razi Hospital,hospital,Rasht,Gilan\n"
+            "sina,Sina,hospital,Tehran,Tehran\n",
+            ".csv",
+        )
+        self.assertIn("Imported 3 rows", stdout)
+        self.assertIn("2 created, 0 updated, 0 skipped, 1 duplicates", stdout)
+        self.assertIn("Line 2: dropped, slug 'razi' is repeated on line 3", stderr)
+        self.assertEqual(MedicalFacility.objects.get(slug="razi").name, "Razi Hospital")
+
+    def test_each_chunk_invalidates_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.run_import(
+                "name,type,city,province\n"
+                "Sina,hospital,Tehran,Tehran\n"
+                "Razi,hospital,Rasht,Gilan\n",
+                ".csv",
+                "--batch-size",
+                "1",
+            )
+        self.assertEqual(len(callbacks), 2)
+
+
+class MedicalFacilityExportTests(TestCase):
+    url = "/medical_facility/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        hospital = MedicalFacilityType.objects.create(slug="hospital", title="Hospital")
+        for i in range(3):
+            MedicalFacility.objects.create(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=hospital,
+                city="Shiraz",
+                province="Fars",
+            )
+
+    def export(self, query="", accept="*/*"):
+        response = self.client.get(f"{self.url}?{query}", HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv(self):
+        for accept, query in (("text/csv", ""), ("*/*", "export_format=csv")):
+            response, body = self.export(query, accept)
+            self.assertTrue(response["Content-Type"].startswith("text/csv"))
+            self.assertIn('.csv"', response["Content-Disposition"])
+            header, *rows = list(csv.reader(body.splitlines()))
+            self.assertEqual(header, MedicalFacilityViewSet.list_fields)
+            self.assertEqual(len(rows), 3)
+
+    def test_ndjson(self):
+        for accept, query in (
+            ("application/x-ndjson", ""),
+            ("*/*", "export_format=ndjson"),
+        ):
+            response, body = self.export(query, accept)
+            self.assertTrue(
+                response["Content-Type"].startswith("application/x-ndjson")
+            )
+            rows = [json.loads(line) for line in body.splitlines()]
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(set(rows[0]), set(MedicalFacilityViewSet.list_fields))
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            f"{self.url}?export_format=xml", HTTP_ACCEPT="text/csv"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("export_format", response.json())
+
+
+def encode_feed_cursor(position):
+    return urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+class MedicalFacilityChangesFeedTests(TestCase):
+    url = "/medical_facility/changes/"
+
+    @classmethod
+    def setUpTestData(cls):
+        hospital = MedicalFacilityType.objects.create(slug="hospital", title="Hospital")
+        for i in range(3):
+            MedicalFacility.objects.create(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=hospital,
+                city="Shiraz",
+                province="Fars",
+            )
+        # Older than the feed's settle time
+        cls.past = timezone.now() - timedelta(minutes=5)
+        MedicalFacility.objects.update(updated_at=cls.past)
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changed_rows(self):
+        first = self.get(limit=2)
+        self.assertEqual(len(first["results"]), 2)
+        self.assertTrue(first["has_more"])
+
+        second = self.get(limit=2, cursor=first["cursor"])
+        self.assertEqual(len(second["results"]), 1)
+        self.assertFalse(second["has_more"])
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        self.assertEqual(sorted(ids), ids)
+        self.assertEqual(len(set(ids)), 3)
+
+        self.assertEqual(self.get(cursor=second["cursor"])["results"], [])
+
+    def test_tombstones(self):
+        cursor = encode_feed_cursor(
+            {
+                "u": timezone.now().isoformat(),
+                "i": 0,
+                "d": (self.past - timedelta(minutes=1)).isoformat(),
+                "t": 0,
+            }
+        )
+        MedicalFacility.objects.all().delete()
+        MedicalFacilityTombstone.objects.update(deleted_at=self.past)
+
+        first = self.get(limit=2, cursor=cursor)
+        self.assertEqual(len(first["deleted"]), 2)
+        self.assertTrue(first["has_more"])
+        second = self.get(limit=2, cursor=first["cursor"])
+        self.assertEqual(len(second["deleted"]), 1)
+        self.assertFalse(second["has_more"])
+        slugs = {row["slug"] for row in first["deleted"] + second["deleted"]}
+        self.assertEqual(slugs, {"facility-0", "facility-1", "facility-2"})
+
+    def test_malformed_cursors(self):
+        now = timezone.now().isoformat()
+        positions = [
+            {"u": now, "i": None, "d": None, "t": None},
+            {"u": None, "i": None, "d": now, "t": None},
+            {"u": None, "i": 3, "d": None, "t": None},
+            {"u": now, "i": "3", "d": None, "t": None},
+            {"u": "yesterday", "i": 3, "d": None, "t": None},
+            {"u": now, "i": 3},
+            [now, 3, now, 3],
+        ]
+        for position in positions:
+            response = self.client.get(
+                self.url, {"cursor": encode_feed_cursor(position)}
+            )
+            self.assertEqual(response.status_code, 400, position)
+        response = self.client.get(self.url, {"cursor": "not base64!"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MedicalFacilityConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+        cls.facility = MedicalFacility.objects.create(
+            slug="facility",
+            name="Facility",
+            type=cls.hospital,
+            city="Shiraz",
+            province="Fars",
+        )
+        cls.url = f"/medical_facility/{cls.facility.pk}/"
+
+    def get(self, query="", etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(f"{self.url}?{query}", **headers)
+
+    def test_unchanged_detail_not_modified(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+
+    def test_sparse_fieldset_has_its_own_etag(self):
+        etag = self.get()["ETag"]
+        response = self.get("fields=name", etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_renamed_lookup_changes_etag(self):
+        etag = self.get("expand=type")["ETag"]
+        self.hospital.title = "General Hospital"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hospital.save()
+        self.assertEqual(self.get("expand=type", etag=etag).status_code, 200)
+
+    def test_unrelated_write_keeps_etag(self):
+        etag = self.get()["ETag"]
+        other = MedicalFacility.objects.create(
+            slug="other", name="Other", type=self.hospital, city="Yazd", province="Yazd"
+        )
+        other.name = "Other Facility"
+        other.save()
+
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+        response = self.client.patch(
+            self.url,
+            {"phone_number": "+98 71 1234"},
+            content_type="application/json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ActiveFacilitiesOnly(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.is_active
+
+
+class MedicalFacilityBulkTests(TestCase):
+    url = "/medical_facility/bulk/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+        cls.active, cls.inactive = (
+            MedicalFacility.objects.create(
+                slug=f"facility-{i}",
+                name=f"Facility {i}",
+                type=cls.hospital,
+                city="Shiraz",
+                province="Fars",
+                history="<p>History</p>",
+                is_active=i == 0,
+            )
+            for i in range(2)
+        )
+
+    def send(self, method, items, query=""):
+        return getattr(self.client, method)(
+            f"{self.url}?{query}", items, content_type="application/json"
+        )
+
+    def new_item(self, **data):
+        return {
+            "name": "Sina",
+            "city": "Tehran",
+            "province": "Tehran",
+            "type": self.hospital.pk,
+            **data,
+        }
+
+    def test_created_slugs_are_unique(self):
+        response = self.send("post", [self.new_item(), self.new_item()])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [result["data"]["slug"] for result in response.json()["results"]],
+            ["sina-tehran", "sina-tehran-2"],
+        )
+
+    def test_partial_failure(self):
+        response = self.send("post", [self.new_item(), self.new_item(type=None)])
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual((body["succeeded"], body["failed"]), (1, 1))
+        self.assertEqual(
+            [result["status"] for result in body["results"]], [201, 400]
+        )
+        self.assertTrue(MedicalFacility.objects.filter(slug="sina-tehran").exists())
+
+    def test_atomic_request_writes_nothing(self):
+        response = self.send(
+            "patch",
+            [{"id": self.active.pk, "city": "Yazd"}, {"id": 0, "city": "Yazd"}],
+            "atomic=true",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["succeeded"], 0)
+        self.assertEqual(
+            MedicalFacility.objects.get(pk=self.active.pk).city, "Shiraz"
+        )
+
+    def test_update_writes_only_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send(
+                "patch", [{"id": self.active.pk, "phone_number": "+98 71 1234"}]
+            )
+        self.assertEqual(response.status_code, 200)
+        (update,) = [
+            query["sql"] for query in queries if query["sql"].startswith("UPDATE")
+        ]
+        self.assertIn("phone_number", update)
+        self.assertIn("updated_at", update)
+        self.assertNotIn("history", update)
+        self.assertNotIn("city", update)
+
+    @mock.patch.object(
+        MedicalFacilityViewSet, "permission_classes", [ActiveFacilitiesOnly]
+    )
+    def test_object_permissions(self):
+        # The test client is anonymous, so denied rows answer 401.
+        items = [{"id": self.active.pk, "city": "Yazd"}, {"id": self.inactive.pk}]
+        response = self.send("patch", items)
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]], [200, 401]
+        )
+
+        response = self.send("delete", [self.active.pk, self.inactive.pk])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]], [204, 401]
+        )
+        self.assertEqual(
+            list(MedicalFacility.objects.values_list("pk", flat=True)),
+            [self.inactive.pk],
+        )
+
+
+class SlugAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+        cls.existing = cls.create_facility("sina-tehran")
+
+    @classmethod
+    def create_facility(cls, slug, name="Sina"):
+        return MedicalFacility.objects.create(
+            slug=slug, name=name, type=cls.hospital, city="Tehran", province="Tehran"
+        )
+
+    def test_collisions_within_a_batch(self):
+        self.assertEqual(
+            allocate_slugs(MedicalFacility, ["sina-shiraz", "sina-shiraz", "razi"]),
+            ["sina-shiraz", "sina-shiraz-2", "razi"],
+        )
+
+    def test_collisions_with_existing_rows(self):
+        self.create_facility("sina-tehran-2")
+        self.assertEqual(
+            allocate_slugs(MedicalFacility, ["sina-tehran", "sina-tehran"]),
+            ["sina-tehran-3", "sina-tehran-4"],
+        )
+        self.assertEqual(
+            allocate_slugs(
+                MedicalFacility, ["sina-tehran"], exclude_pks=[self.existing.pk]
+            ),
+            ["sina-tehran"],
+        )
+
+    def test_suffix_fits_max_length(self):
+        base = "a" * 50
+        self.create_facility(base)
+        self.assertEqual(
+            allocate_slugs(MedicalFacility, [base, base]),
+            ["a" * 48 + "-2", "a" * 48 + "-3"],
+        )
+
+    def test_slug_taken_concurrently_is_allocated_again(self):
+        calls = []
+
+        def allocate(model, bases, **kwargs):
+            # The first allocation loses the race to `self.existing`.
+            calls.append(bases)
+            if len(calls) == 1:
+                return ["sina-tehran"]
+            return allocate_slugs(model, bases, **kwargs)
+
+        serializer = MedicalFacilitySerializer(
+            data={
+                "name": "Sina",
+                "city": "Tehran",
+                "province": "Tehran",
+                "type": self.hospital.pk,
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        with mock.patch(
+            "apps.common.serializers.serializers.allocate_slugs", allocate
+        ):
+            facility = serializer.save()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(facility.slug, "sina-tehran-2")
+
+    def test_migration_backfill(self):
+        placeholder = self.create_facility("1")
+        blank = self.create_facility("")
+        migration = import_module(
+            "apps.facilities.migrations.0004_backfill_medicalfacility_slugs"
+        )
+        migration.backfill_slugs(
+            django_apps, SimpleNamespace(connection=connection)
+        )
+        self.assertEqual(
+            MedicalFacility.objects.get(pk=placeholder.pk).slug, "sina-tehran-2"
+        )
+        self.assertEqual(MedicalFacility.objects.get(pk=blank.pk).slug, "sina-tehran-3")
+        self.assertEqual(
+            MedicalFacility.objects.get(pk=self.existing.pk).slug, "sina-tehran"
+        )
+
+
+class StreamingMultiPartParserTests(TestCase):
+    url = "/medical_facility/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hospital = MedicalFacilityType.objects.create(
+            slug="hospital", title="Hospital"
+        )
+
+    def setUp(self):
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        self.upload_dir = upload_dir.name
+        settings = self.settings(FILE_UPLOAD_TEMP_DIR=self.upload_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def post(self, logo, **extra):
+        data = {
+            "name": "Sina",
+            "city": "Tehran",
+            "province": "Tehran",
+            "type": self.hospital.pk,
+            "logo": logo,
+        }
+        return self.client.post(self.url, data, **extra)
+
+    def test_oversized_request_rejected_before_reading(self):
+        logo = SimpleUploadedFile("logo.png", b"\x89PNG", content_type="image/png")
+        response = self.post(logo, CONTENT_LENGTH=str(10 * 1024 * 1024))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(MedicalFacility.objects.exists())
+
+    def test_oversized_file_stops_the_upload(self):
+        size = MedicalFacilityViewSet.upload_max_size + 1
+        logo = SimpleUploadedFile("logo.png", b"\0" * size, content_type="image/png")
+        response = self.post(logo)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(MedicalFacility.objects.exists())
+        # The partial temporary file was deleted.
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+    def test_disallowed_content_type(self):
+        logo = SimpleUploadedFile("logo.txt", b"text", content_type="text/plain")
+        response = self.post(logo)
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(MedicalFacility.objects.exists())
+
+    def test_json_bodies_still_parsed(self):
+        facility = MedicalFacility.objects.create(
+            slug="sina", name="Sina", type=self.hospital, city="Tehran", province="Tehran"
+        )
+        response = self.client.patch(
+            f"{self.url}{facility.pk}/",
+            {"phone_number": "+98 21 1234"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        facility.refresh_from_db()
+        self.assertEqual(facility.phone_number, "+98 21 1234")
@@ -22,8 +22,17 @@ Registered endpoints:
     - GET     /medical_facility/           → list all medical facilities
     - POST    /medical_facility/           → create a new facility
     - GET     /medical_facility/{id}/      → retrieve a facility
+    - GET     /medical_facility/batch/?ids=1,2 → retrieve several facilities by id or slug
     - PUT     /medical_facility/{id}/      → update a facility
     - DELETE  /medical_facility/{id}/      → delete a facility
+    - GET     /medical_facility/autocomplete/ → typeahead suggestions by name
+    - GET     /medical_facility/export/    → stream the filtered list as CSV / NDJSON
+    - GET     /medical_facility/by-slug/{slug}/ → retrieve a facility by slug
+    - GET     /medical_facility/facets/    → counts per province, city, type, ownership
+    - GET     /medical_facility/changes/   → rows changed and deleted since a cursor
+    - GET     /reference/types/            → facility types (also subtypes/,
+                                             ownership-types/; list and {id}/)
+    - GET     /reference/bootstrap/        → all lookup tables in one payload
 
 License: GPLv2
 """
@@ -32,11 +41,34 @@ License: GPLv2
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 
-from apps.facilities.views import MedicalFacilityViewSet
+from apps.facilities.views import (
+    MedicalFacilityViewSet,
+    MedicalFacilityTypeViewSet,
+    MedicalFacilitySubTypeViewSet,
+    MedicalFacilityOwnershipTypeViewSet,
+    ReferenceBootstrapView,
+)
 
 medical_facility = SimpleRouter()
 medical_facility.register(r"", MedicalFacilityViewSet, basename="medical_facility")
 
+reference = SimpleRouter()
+reference.register(r"types", MedicalFacilityTypeViewSet, basename="facility_type")
+reference.register(
+    r"subtypes", MedicalFacilitySubTypeViewSet, basename="facility_subtype"
+)
+reference.register(
+    r"ownership-types",
+    MedicalFacilityOwnershipTypeViewSet,
+    basename="facility_ownership_type",
+)
+
 urlpatterns = [
     path("medical_facility/", include(medical_facility.urls)),
+    path(
+        "reference/bootstrap/",
+        ReferenceBootstrapView.as_view(),
+        name="reference_bootstrap",
+    ),
+    path("reference/", include(reference.urls)),
 ]
@@ -1,7 +1,17 @@
 from .facilities import (
     MedicalFacilityViewSet,
 )
+from .reference import (
+    MedicalFacilityTypeViewSet,
+    MedicalFacilitySubTypeViewSet,
+    MedicalFacilityOwnershipTypeViewSet,
+    ReferenceBootstrapView,
+)
 
 __all__ = [
     "MedicalFacilityViewSet",
+    "MedicalFacilityTypeViewSet",
+    "MedicalFacilitySubTypeViewSet",
+    "MedicalFacilityOwnershipTypeViewSet",
+    "ReferenceBootstrapView",
 ]
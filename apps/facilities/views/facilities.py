@@ -17,12 +17,29 @@ Description:
 This file includes:
     - MedicalFacilityViewSet: A reusable and extendable ViewSet for managing
       MedicalFacility instances, including support for:
-        • Queryset filtering
+        • Queryset filtering through `MedicalFacilityFilterSet` (indexed
+          exact / `in` / range filters)
         • Searchable fields (name, type, city, etc.)
-        • Default ordering
+        • Newest-first default ordering and a whitelist of client-selectable
+          orderings (also usable as keyset pagination keys)
+        • A lightweight `autocomplete` action for typeahead search boxes
+        • Server-side caching of list/retrieve responses (`CachedResponseMixin`)
+        • Streaming CSV / NDJSON export of the filtered list (`ExportMixin`)
+        • Retrieval by slug for public pages (`SlugLookupMixin`)
+        • Grouped counts for the filter sidebar (`FacetMixin`)
+        • A delta sync feed with deletion tombstones (`ChangesFeedMixin`)
+        • JSON bodies for writes without a logo; logo uploads streamed to
+          temporary files, limited to 2 MiB images
+        • A summary field set for `list` that leaves out the large HTML fields
+          (`history`, `presentation`, `legal_charters`) unless requested
         • Serializer integration
 
 It leverages:
+    - CachedResponseMixin: Generation-invalidated response cache
+    - ExportMixin: Constant-memory streaming export
+    - SlugLookupMixin: Cached slug → id resolution for `by-slug/<slug>/`
+    - FacetMixin: Cached facet counts, one GROUPING SETS query on PostgreSQL
+    - ChangesFeedMixin: `changes` feed over the `updated_at` index
     - BaseCRUDViewSet: A custom base class that encapsulates standard
       DRF functionality with project-specific extensions
     - MedicalFacilitySerializer: Serializer responsible for JSON representation
@@ -31,21 +48,88 @@ It leverages:
 License: GPLv2
 """
 
-from apps.common.views import BaseCRUDViewSet
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.common.autocomplete import AutocompleteIndex
+from apps.common.views import (
+    BaseCRUDViewSet,
+    CachedResponseMixin,
+    ChangesFeedMixin,
+    ExportMixin,
+    FacetMixin,
+    SlugLookupMixin,
+)
+from apps.facilities.filters import MedicalFacilityFilterSet
 from apps.facilities.models import (
     MedicalFacility,
     MedicalFacilityType,
     MedicalFacilitySubType,
     MedicalFacilityOwnershipType,
+    MedicalFacilityTombstone,
 )
 from apps.facilities.serializers import MedicalFacilitySerializer
 
 
-class MedicalFacilityViewSet(BaseCRUDViewSet):
+class MedicalFacilityViewSet(
+    CachedResponseMixin,
+    ExportMixin,
+    FacetMixin,
+    SlugLookupMixin,
+    ChangesFeedMixin,
+    BaseCRUDViewSet,
+):
     queryset = MedicalFacility.objects.all()
     serializer_class = MedicalFacilitySerializer
 
-    ordering = ["slug", "name", "city", "province"]
+    # Expanded responses embed the lookup tables, so they invalidate too
+    cache_dependencies = [
+        MedicalFacility,
+        MedicalFacilityType,
+        MedicalFacilitySubType,
+        MedicalFacilityOwnershipType,
+    ]
+
+    # `history`, `presentation` and `legal_charters` are only loaded on
+    # retrieve, or on list with `?fields=...` / `?fields=*`
+    list_fields = [
+        "id",
+        "slug",
+        "name",
+        "type",
+        "subtype",
+        "ownership",
+        "city",
+        "province",
+        "logo",
+        "is_active",
+        "created_at",
+        "updated_at",
+    ]
+
+    # Query budgets checked when `QUERY_COUNT_ASSERTIONS` is enabled
+    expected_query_counts = {
+        "list": 2,
+        "retrieve": 1,
+        "batch_retrieve": 1,
+        "autocomplete": 1,
+        "facets": 4,
+        "changes": 3,
+    }
+
+    filterset_class = MedicalFacilityFilterSet
+
+    # Newest first, like `MedicalFacility.Meta.ordering`: served by the
+    # `(-created_at, -id)` indexes, `-id` also being the keyset tiebreaker
+    ordering = ["-created_at", "-id"]
+    ordering_fields = [
+        "created_at",
+        "updated_at",
+        "slug",
+        "name",
+        "city",
+        "province",
+    ]
     search_fields = [
         "name",
         "city",
@@ -54,3 +138,49 @@ class MedicalFacilityViewSet(BaseCRUDViewSet):
         "subtype__title",
         "ownership__title",
     ]
+
+    # Filter sidebar counts, honoring the active filters and search
+    facet_fields = {
+        "province": ["province"],
+        "city": ["city"],
+        "type": ["type", "type__slug", "type__title"],
+        "ownership": ["ownership", "ownership__slug", "ownership__title"],
+    }
+
+    # Deletions reported by the `changes` sync feed
+    changes_tombstone_model = MedicalFacilityTombstone
+
+    # `logo` uploads: rejected early when too large or not an image
+    upload_max_size = 2 * 1024 * 1024
+    upload_content_types = ["image/png", "image/jpeg", "image/gif", "image/webp"]
+
+    autocomplete_index = AutocompleteIndex(
+        MedicalFacility,
+        search_field="name",
+        fields=["id", "slug", "name", "city"],
+    )
+    autocomplete_limit = 10
+    autocomplete_max_limit = 20
+
+    @action(
+        detail=False,
+        methods=["get"],
+        pagination_class=None,
+        filter_backends=[],
+    )
+    def autocomplete(self, request):
+        """
+        GET /medical_facility/autocomplete/?q=<text>&limit=<int>
+
+        Returns `[{"id", "slug", "name", "city"}, ...]` for facilities whose
+        name matches the typed prefix (or is trigram-similar to it), served
+        from an in-process index instead of the database.
+        """
+        try:
+            limit = int(request.query_params.get("limit", self.autocomplete_limit))
+        except ValueError:
+            limit = self.autocomplete_limit
+        limit = max(0, min(limit, self.autocomplete_max_limit))
+
+        query = request.query_params.get("q", "")
+        return Response(self.autocomplete_index.search(query, limit=limit))
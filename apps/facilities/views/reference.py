@@ -0,0 +1,85 @@
+"""
+================================================================================
+Facility Reference Data Views - H.CORE Project
+================================================================================
+
+This module defines the read-only API of the facility lookup tables (types,
+subtypes and ownership types).
+
+Author:        H.CORE Backend Team <amiran.amirhossein@gmail.com>
+Project:       H.CORE - Hospital Management System (Open Source)
+Repository:    https://github.com/Hcore-ir/backend-core
+
+Description:
+-------------
+This file includes:
+    - MedicalFacilityTypeViewSet, MedicalFacilitySubTypeViewSet and
+      MedicalFacilityOwnershipTypeViewSet: list / retrieve / batch endpoints
+      for each lookup table, with cached responses
+    - ReferenceBootstrapView: all three tables in one payload, served from a
+      precomputed gzip blob whose `ETag` only changes when one of the tables
+      is written (`BundleView`)
+
+The tables are small, so lists are not paginated.
+
+License: GPLv2
+"""
+
+from apps.common.views import (
+    BundleView,
+    CachedResponseMixin,
+    ReadOnlyListRetrieveViewSet,
+)
+from apps.facilities.models import (
+    MedicalFacilityType,
+    MedicalFacilitySubType,
+    MedicalFacilityOwnershipType,
+)
+from apps.facilities.serializers import (
+    MedicalFacilityTypeSerializer,
+    MedicalFacilitySubTypeSerializer,
+    MedicalFacilityOwnershipTypeSerializer,
+)
+
+
+class ReferenceViewSet(CachedResponseMixin, ReadOnlyListRetrieveViewSet):
+    """
+    Shared configuration of the lookup table endpoints.
+    """
+
+    pagination_class = None
+    ordering = ["title"]
+    ordering_fields = ["id", "slug", "title"]
+    expected_query_counts = {"list": 1, "retrieve": 1, "batch_retrieve": 1}
+
+
+class MedicalFacilityTypeViewSet(ReferenceViewSet):
+    queryset = MedicalFacilityType.objects.all()
+    serializer_class = MedicalFacilityTypeSerializer
+
+
+class MedicalFacilitySubTypeViewSet(ReferenceViewSet):
+    queryset = MedicalFacilitySubType.objects.all()
+    serializer_class = MedicalFacilitySubTypeSerializer
+
+
+class MedicalFacilityOwnershipTypeViewSet(ReferenceViewSet):
+    queryset = MedicalFacilityOwnershipType.objects.all()
+    serializer_class = MedicalFacilityOwnershipTypeSerializer
+
+
+class ReferenceBootstrapView(BundleView):
+    """
+    GET /reference/bootstrap/
+
+    Returns `{"types": [...], "subtypes": [...], "ownership_types": [...]}`.
+    """
+
+    bundle_sections = {
+        "types": (MedicalFacilityType, MedicalFacilityTypeSerializer),
+        "subtypes": (MedicalFacilitySubType, MedicalFacilitySubTypeSerializer),
+        "ownership_types": (
+            MedicalFacilityOwnershipType,
+            MedicalFacilityOwnershipTypeSerializer,
+        ),
+    }
@@ -81,7 +81,17 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.OrderingFilter",
-        "rest_framework.filters.SearchFilter",
+        "apps.common.search.IndexedSearchFilter",
+    ],
+    # orjson-backed JSON (stdlib fallback when orjson is not installed)
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.common.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.common.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
 }
 
@@ -112,3 +122,33 @@ MEDIA_URL = "media/"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Holds the per-model generation counters and everything derived from them
+# (cached list counts, cached responses...). Several worker processes must
+# share one backend so that a write seen by one worker invalidates all.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "h-core"),
+    }
+}
+
+# Cached list/retrieve responses (see `CachedResponseMixin`)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+
+# List pagination counts
+# Exact counts are cached per normalized query until the counted models change;
+# at or above the threshold, PostgreSQL planner estimates replace COUNT(*).
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 300))
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 100000)
+)
+
+# Query budget assertions
+# When enabled, viewsets fail any action that runs more queries than its
+# `expected_query_counts` entry (meant for development and tests).
+QUERY_COUNT_ASSERTIONS = os.getenv("QUERY_COUNT_ASSERTIONS", "False") == "True"
@@ -36,6 +36,17 @@ else:
         }
     }
 
+# Cache
+# Gunicorn runs several workers: default to a file-based cache they all share.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/var/tmp/h-core-cache"),
+    }
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")